@@ -1,40 +1,130 @@
 import { useState, useEffect, useMemo } from 'react'
 import './index.css'
 
+const DATA_URL = './data/'
+
+// Must match normalize() in indexer/search_index.py
+const normalize = text =>
+  text.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase().replace(/[^\p{L}\p{N}]+/gu, ' ').trim()
+
+const wordStarts = name => [name, ...[...name.matchAll(/ /g)].map(m => name.slice(m.index + 1))]
+
+// Player IDs whose name (or a word in it) starts with the query
+function lookup(index, query) {
+  const q = normalize(query)
+  if (!q) return []
+  const ids = index.prefixes[q.slice(0, index.maxPrefix)] || []
+  if (q.length <= index.maxPrefix) return ids
+  return ids.filter(id => wordStarts(index.names[id]).some(start => start.startsWith(q)))
+}
+
+// Turn a legacy mentions.json into the same shape as the sharded format
+function fromLegacy(data) {
+  const players = [...data.players]
+  const ids = new Map(players.map((name, i) => [name, i]))
+  const channels = [...data.channels]
+  const shards = {}
+  for (const video of data.videos) {
+    let channelId = channels.indexOf(video.channel)
+    if (channelId === -1) channelId = channels.push(video.channel) - 1
+    for (const [player, mentions] of Object.entries(video.mentions)) {
+      if (!ids.has(player)) ids.set(player, players.push(player) - 1)
+      const id = ids.get(player)
+      const hits = mentions.map(m => [m.seconds, m.text])
+      ;(shards[id] ||= []).push([video.videoId, channelId, video.date, video.title, video.thumbnail, hits])
+    }
+  }
+  const manifest = {
+    lastUpdated: data.lastUpdated,
+    videoCount: data.videos.length,
+    channels,
+    players,
+    mentionCounts: players.map((_, i) => (shards[i] || []).reduce((a, row) => a + row[5].length, 0))
+  }
+  return { manifest, shards }
+}
+
 function App() {
-  const [data, setData] = useState(null)
+  const [manifest, setManifest] = useState(null)
+  const [index, setIndex] = useState(null)
+  const [shards, setShards] = useState({})
   const [query, setQuery] = useState('')
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
   useEffect(() => {
-    fetch('./data/mentions.json')
+    fetch(`${DATA_URL}manifest.json`)
       .then(res => {
-        if (!res.ok) throw new Error('Failed to load data')
-        return res.json()
+        if (res.ok) {
+          return res.json().then(data => {
+            setManifest(data)
+            if (!data.searchIndex) return
+            return fetch(DATA_URL + data.searchIndex)
+              .then(idx => (idx.ok ? idx.json() : null))
+              .then(setIndex)
+          })
+        }
+        // Older indexer runs only produced the single mentions.json
+        return fetch(`${DATA_URL}mentions.json`).then(legacy => {
+          if (!legacy.ok) throw new Error('Failed to load data')
+          return legacy.json().then(data => {
+            const converted = fromLegacy(data)
+            setShards(converted.shards)
+            setManifest(converted.manifest)
+          })
+        })
       })
-      .then(setData)
       .catch(err => setError(err.message))
       .finally(() => setLoading(false))
   }, [])
 
-  const results = useMemo(() => {
-    if (!data || !query.trim()) return []
+  const matchedIds = useMemo(() => {
+    if (!manifest || !query.trim()) return []
+    if (index) return lookup(index, query)
     const q = query.toLowerCase().trim()
-    
-    return data.videos
-      .map(video => {
-        const matchingMentions = {}
-        for (const [player, mentions] of Object.entries(video.mentions)) {
-          if (player.toLowerCase().includes(q)) {
-            matchingMentions[player] = mentions
-          }
+    return manifest.players
+      .map((name, id) => [name, id])
+      .filter(([name, id]) => manifest.mentionCounts[id] > 0 && name.toLowerCase().includes(q))
+      .map(([, id]) => id)
+  }, [manifest, index, query])
+
+  // Fetch only the player shards the current search needs
+  useEffect(() => {
+    if (!manifest?.playerShards) return
+    const missing = matchedIds.filter(id => !(id in shards))
+    if (!missing.length) return
+    let cancelled = false
+    Promise.all(missing.map(id =>
+      fetch(DATA_URL + manifest.playerShards.replace('{id}', id))
+        .then(res => (res.ok ? res.json() : []))
+        .catch(() => [])
+        .then(rows => [id, rows])
+    )).then(loaded => {
+      if (!cancelled) setShards(prev => ({ ...prev, ...Object.fromEntries(loaded) }))
+    })
+    return () => { cancelled = true }
+  }, [manifest, matchedIds, shards])
+
+  const searching = matchedIds.some(id => !(id in shards))
+
+  const results = useMemo(() => {
+    const videos = new Map()
+    for (const id of matchedIds) {
+      for (const [videoId, channelId, date, title, thumbnail, hits] of shards[id] || []) {
+        if (!videos.has(videoId)) {
+          videos.set(videoId, {
+            videoId, date, title, thumbnail,
+            channel: manifest.channels[channelId],
+            mentions: {}
+          })
         }
-        if (Object.keys(matchingMentions).length === 0) return null
-        return { ...video, mentions: matchingMentions }
-      })
-      .filter(Boolean)
-  }, [data, query])
+        videos.get(videoId).mentions[manifest.players[id]] = hits.map(([seconds, text]) => ({ seconds, text }))
+      }
+    }
+    return [...videos.values()].sort((a, b) =>
+      b.date.localeCompare(a.date) || b.videoId.localeCompare(a.videoId)
+    )
+  }, [manifest, matchedIds, shards])
 
   const stats = useMemo(() => {
     if (!results.length) return null
@@ -46,18 +136,15 @@ function App() {
   }, [results])
 
   const topPlayers = useMemo(() => {
-    if (!data) return []
-    const counts = {}
-    for (const video of data.videos) {
-      for (const [player, mentions] of Object.entries(video.mentions)) {
-        counts[player] = (counts[player] || 0) + mentions.length
-      }
-    }
-    return Object.entries(counts)
+    if (!manifest) return []
+    if (index) return index.top.slice(0, 12).map(id => manifest.players[id])
+    return manifest.players
+      .map((name, id) => [name, manifest.mentionCounts[id]])
+      .filter(([, count]) => count > 0)
       .sort((a, b) => b[1] - a[1])
       .slice(0, 12)
       .map(([name]) => name)
-  }, [data])
+  }, [manifest, index])
 
   const formatTimestamp = (seconds) => {
     const h = Math.floor(seconds / 3600)
@@ -81,7 +168,7 @@ function App() {
         <div className="error">
           <h2>Error loading data</h2>
           <p>{error}</p>
-          <p>Run the indexer to generate mentions.json</p>
+          <p>Run the indexer to generate the mention data</p>
         </div>
       </div>
     )
@@ -95,7 +182,7 @@ function App() {
           Track player mentions across Rocket League YouTube videos
         </p>
         <p className="meta">
-          {data.videos.length} videos indexed • Last updated: {new Date(data.lastUpdated).toLocaleDateString()}
+          {manifest.videoCount} videos indexed • Last updated: {new Date(manifest.lastUpdated).toLocaleDateString()}
         </p>
       </header>
 
@@ -126,7 +213,7 @@ function App() {
       )}
 
       <div className="results">
-        {query && results.length === 0 && (
+        {query && !searching && results.length === 0 && (
           <div className="no-results">
             No mentions found for "{query}"
           </div>
@@ -167,7 +254,7 @@ function App() {
                         className="timestamp"
                         title={m.text}
                       >
-                        {m.time}
+                        {formatTimestamp(m.seconds)}
                       </a>
                     ))}
                   </div>
@@ -0,0 +1,7 @@
+"""Lets the indexer directory run as a program: python indexer <command>."""
+
+import sys
+
+from run import main
+
+sys.exit(main())
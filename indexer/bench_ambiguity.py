@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Ambiguity Filter Benchmark
+Plants common-word player names in synthetic transcripts, both as real
+mentions (in Rocket League talk, often near another player) and as everyday
+words, then reports how many of each the context filter keeps and what it
+costs on top of matching.
+"""
+
+import random
+import sys
+import time
+
+from disambiguate import RL_VOCABULARY, AmbiguityFilter
+from fetcher import Snippet
+from matcher import find_mentions, get_matcher
+from players import ALL_PLAYERS, ALIASES, AMBIGUOUS_NAMES
+
+EVERYDAY = (
+    'so today we are going to look at what i think is the best way to get better '
+    'at this and honestly it took me a while to figure out but once you see it you '
+    'cannot unsee it let me know in the comments what you think about it'
+).split()
+
+RL_WORDS = sorted(RL_VOCABULARY)
+PLANT_RATE = 0.04
+
+
+def make_transcript(rng, segments, cased, others, planted, t):
+    lines = []
+    for i in range(segments):
+        words = rng.choices(EVERYDAY, k=rng.randint(6, 10))
+        if rng.random() < 0.15:
+            words.insert(rng.randrange(len(words)), rng.choice(RL_WORDS))
+        roll = rng.random()
+        if roll < PLANT_RATE:
+            # A real mention: the name as written, in game talk
+            name = rng.choice(AMBIGUOUS_NAMES)
+            words[rng.randrange(1, len(words)):1] = [name, rng.choice(RL_WORDS)]
+            if rng.random() < 0.5:
+                words.append(rng.choice(others))
+            planted.append((t, i, True))
+        elif roll < 2 * PLANT_RATE:
+            # The same word in everyday speech
+            words.insert(rng.randrange(1, len(words)), rng.choice(AMBIGUOUS_NAMES).lower())
+            planted.append((t, i, False))
+        text = ' '.join(words)
+        lines.append(Snippet(text if cased else text.lower(), i * 3.0, 3.0))
+    return lines
+
+
+def main(transcript_count=300, segments=400):
+    rng = random.Random(5)
+    matcher = get_matcher(ALL_PLAYERS, ALIASES)
+    ambiguity = AmbiguityFilter(AMBIGUOUS_NAMES)
+    ambiguous = {name.lower() for name in AMBIGUOUS_NAMES}
+    others = [name for name in ALL_PLAYERS if name.lower() not in ambiguous]
+
+    planted = []
+    transcripts = [
+        make_transcript(rng, segments, t % 2 == 0, others, planted, t) for t in range(transcript_count)
+    ]
+    total = transcript_count * segments
+    print(f"{total:,} segments, {len(planted):,} planted common-word hits "
+          f"(half cased captions, half auto-caption lowercase)")
+
+    plain = [find_mentions(t, matcher) for t in transcripts]
+    filtered = [find_mentions(t, matcher, ambiguity=ambiguity) for t in transcripts]
+
+    # Time the two stages on their own, interleaved, as this is noisy
+    texts = [[entry.text for entry in t] for t in transcripts]
+    match_times, filter_times = [], []
+    for _ in range(5):
+        start = time.perf_counter()
+        hits = [list(matcher.scan_segments(lines)) for lines in texts]
+        match_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for lines, found in zip(texts, hits):
+            ambiguity.filter(lines, found)
+        filter_times.append(time.perf_counter() - start)
+    match_time, filter_time = min(match_times), min(filter_times)
+
+    def kept(results, real):
+        found = set()
+        for t, mentions in enumerate(results):
+            for player, hits in mentions.items():
+                for hit in hits:
+                    found.add((t, hit['seconds'] // 3))
+        subset = [(t, i) for t, i, is_real in planted if is_real == real]
+        return sum((t, i) in found for t, i in subset) / len(subset)
+
+    print(f"{'':>10} {'real kept':>10} {'false kept':>11} {'mentions':>9}")
+    for label, results in (('unfiltered', plain), ('filtered', filtered)):
+        count = sum(len(hits) for mentions in results for hits in mentions.values())
+        print(f"{label:>10} {kept(results, True):>10.1%} {kept(results, False):>11.1%} {count:>9,}")
+    print(f"Matching: {match_time:.2f}s, filter: {filter_time:.3f}s "
+          f"({filter_time / match_time:.1%} of matching time)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
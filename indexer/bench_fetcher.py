@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Fetcher Benchmark
+Runs TranscriptFetcher offline against FakeTranscriptProvider with injected
+latency, missing transcripts, errors and IP blocks.
+"""
+
+import sys
+import time
+
+from fetcher import BackoffGate, FakeTranscriptProvider, TranscriptFetcher
+
+
+def run(workers, video_count, rate, **fake_options):
+    provider = FakeTranscriptProvider(**fake_options)
+    fetcher = TranscriptFetcher(
+        provider=provider,
+        workers=workers,
+        rate=rate,
+        burst=workers,
+        gate=BackoffGate(base=0.2, maximum=1.0),
+    )
+    video_ids = [f"vid{i:05d}" for i in range(video_count)]
+
+    start = time.perf_counter()
+    results = dict(fetcher.fetch_all(video_ids))
+    elapsed = time.perf_counter() - start
+
+    fetched = sum(1 for t in results.values() if t)
+    print(
+        f"{workers:>7} {elapsed:>8.2f}s {video_count / elapsed:>9.1f}/s "
+        f"{fetched:>7}/{video_count} {provider.calls:>6} {provider.clients:>7} "
+        f"{fetcher.gate.trips:>5}"
+    )
+    return results
+
+
+def main(video_count=200):
+    options = dict(latency=0.05, jitter=0.05, missing_rate=0.1, error_rate=0.02, block_rate=0.01)
+    print(f"{'workers':>7} {'elapsed':>9} {'videos/s':>11} {'fetched':>11} {'calls':>6} "
+          f"{'clients':>7} {'trips':>5}")
+    for workers in (1, 4, 8, 16):
+        run(workers, video_count, rate=0, **options)
+
+    print("\nWith a 40 req/s token bucket:")
+    for workers in (4, 16):
+        run(workers, video_count, rate=40, **options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Full-Text Index Benchmark
+Builds an FTS5 caption index over ~1M synthetic segments and times phrase
+queries (common, rare and missing phrases) including context lookups.
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fetcher import Snippet
+from fulltext import FullTextIndex
+
+WORDS = (
+    'the ball goes up and he hits a flip reset off the wall what a save into '
+    'the net demo on the keeper kickoff boost pad aerial double tap ceiling '
+    'shot musty flick air dribble rotation back post pinch that was clean'
+).split()
+
+PHRASES = ['flip reset', 'double tap', 'air dribble', 'what a save', 'musty flick into',
+           'ceiling shot', 'zen goes crazy', 'kickoff boost']
+
+
+def make_transcript(rng, segments, names):
+    transcript = []
+    for i in range(segments):
+        words = rng.choices(WORDS, k=rng.randint(5, 10))
+        if rng.random() < 0.01:
+            words.insert(rng.randrange(len(words)), rng.choice(names))
+        transcript.append(Snippet(' '.join(words), i * 3.2, 3.0))
+    return transcript
+
+
+def main(video_count=2000, segments_per_video=500, query_rounds=25):
+    rng = random.Random(3)
+    names = ['zen', 'vatira', 'firstkiller', 'atow', 'daniel']
+    with tempfile.TemporaryDirectory() as tmp:
+        index = FullTextIndex(Path(tmp) / 'fulltext.db')
+
+        print(f"Indexing {video_count:,} videos x {segments_per_video} segments...")
+        start = time.perf_counter()
+        for i in range(video_count):
+            index.add_video(f"vid{i:06d}", make_transcript(rng, segments_per_video, names), commit=False)
+            if i % 100 == 99:
+                index.conn.commit()
+        index.conn.commit()
+        build = time.perf_counter() - start
+        print(f"Build: {build:.1f}s ({len(index):,} segments, "
+              f"{(Path(tmp) / 'fulltext.db').stat().st_size / 1e6:.0f} MB)")
+
+        start = time.perf_counter()
+        index.add_video('vid_extra', make_transcript(rng, segments_per_video, names))
+        print(f"Incremental append of one video: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        print(f"{'phrase':>18} {'hits':>5} {'mean ms':>9} {'p50 ms':>8} {'max ms':>8}")
+        for phrase in PHRASES:
+            times = []
+            for _ in range(query_rounds):
+                start = time.perf_counter()
+                hits = index.search(phrase)
+                times.append((time.perf_counter() - start) * 1000)
+            times.sort()
+            print(f"{phrase:>18} {len(hits):>5} {statistics.mean(times):>9.2f} "
+                  f"{times[len(times) // 2]:>8.2f} {times[-1]:>8.2f}")
+
+        index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Matcher Benchmark
+Plants misspelled names (one or two letters changed, as auto-captions do)
+in synthetic caption lines and measures recall and tokens/s of the
+FuzzyMatcher index at 1k and 10k names (with its word cache, and per
+distinct word without it), against comparing every word with every name.
+"""
+
+import random
+import sys
+import time
+
+from bench_matcher import WORDS, make_names
+from fuzzy import FuzzyMatcher, max_edits, edit_distance
+from matcher import WORD_RE, NameMatcher
+
+SIZES = [1000, 10000]
+LINEAR_LINES = 200
+
+
+def misspell(name, rng):
+    """Change up to max_edits letters of a one-word name, keeping its sound."""
+    letters = list(name.lower())
+    for _ in range(max(1, max_edits(len(letters)))):
+        i = rng.randrange(1, len(letters))
+        if letters[i] in 'aeiou':
+            letters[i] = rng.choice('aeiou')
+        else:
+            letters.insert(i, rng.choice('aeiouy'))
+    return ''.join(letters)
+
+
+def make_lines(names, count, rng):
+    """Return caption lines and the planted (line, name) pairs."""
+    single = [name for name in names if ' ' not in name and len(name) >= 5]
+    lines, planted = [], []
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 12))
+        if rng.random() < 0.2:
+            name = rng.choice(single)
+            words.insert(rng.randrange(len(words)), misspell(name, rng))
+            planted.append((i, name))
+        lines.append(' '.join(words))
+    return lines, planted
+
+
+def linear_lookup(word, targets, limit=2):
+    """Compare a word with every name: what the index avoids."""
+    best = None
+    for target in targets:
+        if edit_distance(word, target, limit) <= limit:
+            best = target
+    return best
+
+
+def main(line_count=20000):
+    rng = random.Random(9)
+    print(f"{'names':>7} {'recall':>7} {'false/1k lines':>15} {'tokens/s':>10} "
+          f"{'uncached words/s':>17} {'linear words/s':>15} {'build s':>8}")
+
+    for size in SIZES:
+        names = make_names(size, rng)
+        lines, planted = make_lines(names, line_count, rng)
+        tokens = sum(len(WORD_RE.findall(line)) for line in lines)
+
+        start = time.perf_counter()
+        fuzzy = FuzzyMatcher(NameMatcher(names))
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = [fuzzy.scan(line) for line in lines]
+        elapsed = time.perf_counter() - start
+
+        # Every distinct word once, with nothing cached yet
+        fuzzy.cache.clear()
+        unique = {word for line in lines for word in WORD_RE.findall(line.lower())}
+        start = time.perf_counter()
+        for word in unique:
+            fuzzy.lookup(word)
+        cold = len(unique) / (time.perf_counter() - start)
+
+        found = {(i, hit[2]) for i, line_hits in enumerate(hits) for hit in line_hits}
+        recall = sum(pair in found for pair in planted) / len(planted)
+        wanted = set(planted)
+        false = sum((i, hit[2]) not in wanted for i, line_hits in enumerate(hits) for hit in line_hits)
+
+        targets = [name.lower() for name in names]
+        sample = lines[:LINEAR_LINES]
+        sample_tokens = sum(len(WORD_RE.findall(line)) for line in sample)
+        start = time.perf_counter()
+        for line in sample:
+            for word in WORD_RE.findall(line.lower()):
+                linear_lookup(word, targets)
+        linear = sample_tokens / (time.perf_counter() - start)
+
+        print(f"{size:>7} {recall:>7.1%} {false / line_count * 1000:>15.1f} "
+              f"{tokens / elapsed:>10,.0f} {cold:>17,.0f} {linear:>15,.0f} {build:>8.2f}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Matcher Benchmark
+Compares the single-pass NameMatcher (scan_segments, through names_in)
+against the old one-regex-per-player loop as the roster grows from 100
+to 10,000 names.
+"""
+
+import random
+import re
+import string
+import sys
+import time
+
+from matcher import NameMatcher
+
+WORDS = (
+    'the ball goes up and he hits a ceiling shot off the wall then flips '
+    'into the net what a save by the keeper that was insane kickoff boost '
+    'rotation demo bump air dribble double tap flip reset musty'
+).split()
+
+SIZES = [100, 500, 1000, 2500, 5000, 10000]
+LEGACY_MAX = 2500
+LEGACY_LINES = 2000
+
+
+def make_names(count, rng):
+    """Generate a synthetic roster with some multi-word names.
+
+    No word is shared between names (ignoring case), so no name overlaps
+    another and the longest-match matcher finds what the regex loop does.
+    """
+    names = []
+    words = set()
+    while len(names) < count:
+        name = ''.join(rng.choices(string.ascii_letters, k=rng.randint(3, 9)))
+        if rng.random() < 0.15:
+            name += ' ' + ''.join(rng.choices(string.ascii_letters, k=rng.randint(3, 6)))
+        parts = set(name.lower().split())
+        if parts & words or len(parts) < len(name.split()):
+            continue
+        words |= parts
+        names.append(name)
+    return names
+
+
+def make_lines(names, count, rng):
+    """Generate caption lines where roughly one in five mentions a name."""
+    lines = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 12))
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), rng.choice(names))
+        lines.append(' '.join(words))
+    return lines
+
+
+def legacy_scan(lines, names):
+    patterns = {p: re.compile(rf'\b{re.escape(p)}\b', re.IGNORECASE) for p in names}
+    hits = 0
+    for text in lines:
+        for pattern in patterns.values():
+            if pattern.search(text):
+                hits += 1
+    return hits
+
+
+def matcher_scan(lines, names):
+    matcher = NameMatcher(names)
+    hits = 0
+    for text in lines:
+        hits += len(matcher.names_in(text))
+    return hits
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(line_count=20000):
+    rng = random.Random(42)
+    print(f"{'names':>7} {'matcher lines/s':>16} {'legacy lines/s':>15} {'speedup':>8}")
+
+    for size in SIZES:
+        names = make_names(size, rng)
+        lines = make_lines(names, line_count, rng)
+
+        _, elapsed = timed(matcher_scan, lines, names)
+        fast = line_count / elapsed
+
+        if size <= LEGACY_MAX:
+            sample = lines[:LEGACY_LINES]
+            legacy_hits, legacy_elapsed = timed(legacy_scan, sample, names)
+            if legacy_hits != matcher_scan(sample, names):
+                print(f"Mismatch at {size} names")
+                return 1
+            slow = len(sample) / legacy_elapsed
+            print(f"{size:>7} {fast:>16,.0f} {slow:>15,.0f} {fast / slow:>7.1f}x")
+        else:
+            print(f"{size:>7} {fast:>16,.0f} {'-':>15} {'-':>8}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
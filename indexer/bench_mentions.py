@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Mention Storage Benchmark
+Holds a synthetic corpus of cached videos in memory two ways and reports
+the bytes allocated for each (measured with tracemalloc) and the time to
+compute per-player mention and video totals:
+
+- dicts: one dict per mention, as the cache decodes them
+- table: mention_table.MentionTable's parallel arrays
+
+The table's exported videos must equal the dicts it was built from.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from matcher import format_timestamp
+from mention_table import MentionTable
+from replay import CAPTION_WORDS
+
+
+def make_entries(video_count, player_count, seed=0):
+    """Yield cached videos as JSON, the form the cache stores them in."""
+    rng = random.Random(seed)
+    players = [f"Player{i:04d}" for i in range(player_count)]
+    for i in range(video_count):
+        mentions = {}
+        for _ in range(rng.randint(2, 20)):
+            seconds = rng.randint(0, 3 * 3600)
+            text = ' '.join(rng.choices(CAPTION_WORDS, k=rng.randint(6, 12)))
+            # Some lines name two players and share one caption
+            for player in rng.sample(players, 2 if rng.random() < 0.1 else 1):
+                mention = {'time': format_timestamp(seconds), 'seconds': seconds, 'text': text}
+                if rng.random() < 0.05:
+                    mention['confidence'] = round(rng.uniform(0.8, 0.99), 2)
+                mentions.setdefault(player, []).append(mention)
+        yield json.dumps({
+            'videoId': f"vid{i:06d}",
+            'title': f"Video {i}",
+            'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'thumbnail': f"https://i.ytimg.com/vi/vid{i:06d}/mqdefault.jpg",
+            'channel': f"Channel {i % 25}",
+            'mentions': mentions,
+        })
+
+
+def measure(build):
+    """Return (result, bytes still allocated after build)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def dict_counts(videos):
+    mention_counts = {}
+    video_counts = {}
+    for video in videos:
+        for player, mentions in video['mentions'].items():
+            mention_counts[player] = mention_counts.get(player, 0) + len(mentions)
+            video_counts[player] = video_counts.get(player, 0) + 1
+    return mention_counts, video_counts
+
+
+def table_counts(table):
+    return (
+        dict(zip(table.players, table.mention_counts())),
+        dict(zip(table.players, table.video_counts())),
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Dict vs columnar mention memory benchmark')
+    parser.add_argument('--videos', type=int, default=50000)
+    parser.add_argument('--players', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    entries = list(make_entries(args.videos, args.players))
+    videos, dict_bytes = measure(lambda: [json.loads(entry) for entry in entries])
+    table, table_bytes = measure(
+        lambda: MentionTable.from_videos(json.loads(entry) for entry in entries)
+    )
+    del entries
+    print(f"{table.video_count:,} videos, {len(table):,} mentions, "
+          f"{len(table.segments):,} distinct captions, {len(table.players):,} players")
+
+    dict_totals, dict_seconds = timed(dict_counts, videos)
+    table_totals, table_seconds = timed(table_counts, table)
+
+    print(f"{'storage':>7} {'MB':>8} {'bytes/mention':>14} {'totals ms':>10}")
+    for name, size, seconds in (('dicts', dict_bytes, dict_seconds), ('table', table_bytes, table_seconds)):
+        print(f"{name:>7} {size / 2**20:>8.1f} {size / len(table):>14.0f} {seconds * 1000:>10.1f}")
+    print(f"Typed arrays: {table.nbytes() / 2**20:.1f} MB, "
+          f"table is {table_bytes / dict_bytes:.0%} of the dicts")
+
+    identical = list(table.videos()) == videos and table_totals == dict_totals
+    print(f"Identical export and totals: {identical}")
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Output Writer Benchmark
+Fills a video cache with a synthetic 100k-video corpus and reports the peak
+RSS and time of writing the shards plus mentions.json three ways, each in a
+fresh process:
+
+- in memory: load every video, sort in Python, json.dump (the old writer)
+- streamed: videos read from the cache in date order into write_output
+- merged: videos in random order through sorted_videos' external merge
+"""
+
+import hashlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_search import make_dataset
+from cache import VideoCache
+from export import (
+    CHANNEL_DIR, LEGACY_NAME, PLAYER_DIR, build_shards, dump_compact, sorted_videos, write_output,
+)
+
+MODES = ['memory', 'streamed', 'merged']
+
+
+def cache_videos(cache, newest_first=True):
+    for video_id, entry in cache.entries(with_mentions=True, newest_first=newest_first):
+        yield {
+            'videoId': video_id,
+            'title': entry['title'],
+            'date': entry['date'],
+            'thumbnail': entry['thumbnail'],
+            'channel': entry['channel'],
+            'mentions': entry['mentions'],
+        }
+
+
+def fill_cache(path, video_count, player_count):
+    rng = random.Random(7)
+    data = make_dataset(video_count, player_count, rng)
+    rng.shuffle(data['videos'])
+    cache = VideoCache(path, None)
+    with cache.batch():
+        for video in data['videos']:
+            cache.put(video['videoId'], {**video, 'hash': '', 'roster': ''})
+    cache.close()
+    return {key: value for key, value in data.items() if key != 'videos'}
+
+
+def digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def run(mode, cache_path, out_dir, meta):
+    """Write output one way and return (seconds, peak RSS in MB)."""
+    all_data = dict(json.loads(meta))
+    cache = VideoCache(cache_path, None)
+    out_dir = Path(out_dir)
+    start = time.perf_counter()
+    if mode == 'memory':
+        all_data['videos'] = list(cache_videos(cache, newest_first=False))
+        all_data['videos'].sort(key=lambda x: (x['date'], x['videoId']), reverse=True)
+        manifest, player_shards, channel_shards = build_shards(all_data)
+        for directory, shards in ((PLAYER_DIR, player_shards), (CHANNEL_DIR, channel_shards)):
+            (out_dir / directory).mkdir(parents=True, exist_ok=True)
+            for shard_id, rows in shards.items():
+                dump_compact(rows, out_dir / directory / f"{shard_id}.json")
+        with open(out_dir / LEGACY_NAME, 'w', encoding='utf-8') as f:
+            json.dump(all_data, f, indent=2, ensure_ascii=False)
+    else:
+        newest_first = mode == 'streamed'
+        videos = cache_videos(cache, newest_first=newest_first)
+        all_data['videos'] = videos if newest_first else sorted_videos(videos)
+        write_output(all_data, legacy=True, data_dir=out_dir)
+    elapsed = time.perf_counter() - start
+    cache.close()
+    # ru_maxrss is in kilobytes on Linux
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(video_count=100000, player_count=2000):
+    if len(sys.argv) > 1 and sys.argv[1] == '--fill':
+        print(json.dumps(fill_cache(sys.argv[2], video_count, player_count)))
+        return 0
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        elapsed, peak = run(*sys.argv[2:])
+        print(f"{elapsed} {peak}")
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"Caching {video_count:,} videos with {player_count:,} players...")
+        # In a child too, as a forked child starts with its parent's peak RSS
+        meta = subprocess.run(
+            [sys.executable, __file__, '--fill', str(tmp / 'cache.db')],
+            capture_output=True, text=True, check=True,
+        ).stdout
+
+        print(f"{'writer':>10} {'seconds':>8} {'peak RSS MB':>12} {'mentions.json MB':>17}")
+        outputs = {}
+        for mode in MODES:
+            out_dir = tmp / mode
+            result = subprocess.run(
+                [sys.executable, __file__, '--child', mode, str(tmp / 'cache.db'), str(out_dir), meta],
+                capture_output=True, text=True, check=True,
+            )
+            elapsed, peak = map(float, result.stdout.split()[-2:])
+            outputs[mode] = digest(out_dir / LEGACY_NAME)
+            size = (out_dir / LEGACY_NAME).stat().st_size
+            print(f"{mode:>10} {elapsed:>8.1f} {peak:>12.0f} {size / 2**20:>17.1f}")
+
+        print(f"Identical mentions.json: {len(set(outputs.values())) == 1}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Runs the indexer offline on a synthetic replay corpus, with injected
+listing and transcript latency and failures, and reports videos/s,
+matches/s and peak memory for each stage (listing, fetch, match, write),
+then the cache hit rate of a full cold and warm run through
+main.index_channels. Each stage runs in its own process, reading the
+previous stage's output from disk, so its peak RSS is its own rather than
+the highest of the stages before it. Needs no API key or network, so it can run in CI:
+--json saves the results and --baseline fails the run when a stage gets
+slower than a saved run by more than --tolerance, or mention counts change.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cache import VideoCache
+from export import sorted_videos, write_output
+from fetcher import BackoffGate, TranscriptFetcher
+from listing import ListingError
+from main import ALIASES, AMBIGUITY, index_channels, indexed_video
+from matcher import find_mentions
+from metrics import METRICS
+from players import ALL_PLAYERS
+from replay import ReplayListing, ReplayTranscripts, synthetic_corpus
+from transcripts import TranscriptStore
+
+FETCH_WORKERS = 8
+
+STAGES = ['listing', 'fetch', 'match', 'write', 'cold run', 'warm run']
+
+
+def peak_rss():
+    """Peak RSS of this process so far in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_providers(corpus, args):
+    listing = ReplayListing(corpus, latency=args.list_latency, error_rate=args.error_rate)
+    provider = ReplayTranscripts(
+        corpus, latency=args.fetch_latency, jitter=args.fetch_latency,
+        error_rate=args.error_rate, block_rate=args.block_rate,
+    )
+    fetcher = TranscriptFetcher(
+        provider, workers=FETCH_WORKERS, rate=0, gate=BackoffGate(base=0.05, maximum=0.2)
+    )
+    return listing, provider, fetcher
+
+
+def stage(videos, elapsed, matches=None):
+    return {
+        'seconds': round(elapsed, 3),
+        'videos': videos,
+        'videos_per_s': round(videos / elapsed, 1) if elapsed > 0 else 0.0,
+        'matches': matches,
+        'matches_per_s': round(matches / elapsed, 1) if matches is not None and elapsed > 0 else None,
+        'peak_rss_mb': round(peak_rss(), 1),
+    }
+
+
+def list_channel(listing, client, channel_id):
+    """List a channel, keeping the uploads listed before an injected failure."""
+    try:
+        return listing.list_videos(client, channel_id)
+    except ListingError as e:
+        return e.videos
+
+
+def save(tmp, name, data):
+    with open(tmp / f"{name}.pickle", 'wb') as f:
+        pickle.dump(data, f)
+
+
+def load(tmp, name):
+    with open(tmp / f"{name}.pickle", 'rb') as f:
+        return pickle.load(f)
+
+
+def listing_stage(corpus, args, tmp):
+    listing, _, _ = make_providers(corpus, args)
+    start = time.perf_counter()
+    client = listing.new_client()
+    videos = [
+        (name, video) for name, channel_id in corpus['channels'].items()
+        for video in list_channel(listing, client, channel_id)
+    ]
+    row = stage(len(videos), time.perf_counter() - start)
+    save(tmp, 'listing', videos)
+    return row
+
+
+def fetch_stage(corpus, args, tmp):
+    _, _, fetcher = make_providers(corpus, args)
+    videos = load(tmp, 'listing')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        transcripts = dict(fetcher.fetch_all(video['id'] for _, video in videos))
+    row = stage(len(transcripts), time.perf_counter() - start)
+    row['failures'] = sum(
+        transcripts[video['id']] is None and corpus['transcripts'][video['id']] is not None
+        for _, video in videos
+    )
+    save(tmp, 'fetch', transcripts)
+    return row
+
+
+def match_stage(corpus, args, tmp):
+    videos = load(tmp, 'listing')
+    transcripts = load(tmp, 'fetch')
+    start = time.perf_counter()
+    indexed = []
+    matches = 0
+    for name, video in videos:
+        transcript = transcripts[video['id']]
+        mentions = find_mentions(transcript, ALL_PLAYERS, ALIASES, AMBIGUITY) if transcript else {}
+        matches += sum(len(hits) for hits in mentions.values())
+        if mentions:
+            indexed.append(indexed_video(video, name, mentions))
+    row = stage(len(videos), time.perf_counter() - start, matches)
+    save(tmp, 'match', indexed)
+    return row
+
+
+def write_stage(corpus, args, tmp):
+    indexed = load(tmp, 'match')
+    start = time.perf_counter()
+    all_data = {
+        'lastUpdated': '',
+        'channels': list(corpus['channels']),
+        'players': ALL_PLAYERS,
+        'videos': sorted_videos(indexed),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest = write_output(all_data, legacy=True, data_dir=tmp / 'output')
+    return stage(manifest['videoCount'], time.perf_counter() - start, sum(manifest['mentionCounts']))
+
+
+def indexer_stage(corpus, args, tmp, resume):
+    """Index the corpus cold, or re-run it warm with every video cached by the cold run."""
+    listing, provider, fetcher = make_providers(corpus, args)
+    cache = VideoCache(tmp / 'video_cache.db', None)
+    store = TranscriptStore(tmp / 'transcripts.db')
+    try:
+        if resume:
+            # Queue everything again, as a resumed run finds it
+            for channel_id, uploads in corpus['videos'].items():
+                cache.add_pending(channel_id, uploads)
+        hits = cache.stats()['cache_hits']
+        run_id = cache.start_run('bench')
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            index_channels(cache, store, run_id, resume=resume, listing=listing,
+                           fetcher=fetcher, channels=corpus['channels'], verbose=False)
+        elapsed = time.perf_counter() - start
+        cache.finish_run(run_id, 'complete')
+
+        videos = sum(len(uploads) for uploads in corpus['videos'].values())
+        matches = sum(
+            len(hits) for _, entry in cache.entries(with_mentions=True)
+            for hits in entry['mentions'].values()
+        )
+        # A warm run matches nothing itself, so it gets no match rate
+        row = stage(videos, elapsed, None if resume else matches)
+        row['cache_hit_rate'] = round((cache.stats()['cache_hits'] - hits) / videos, 4)
+        row['fetches'] = provider.calls
+    finally:
+        store.close()
+        cache.close()
+    return row
+
+
+def run_stage(name, corpus, args, tmp):
+    """Run one stage in this process and return its result row."""
+    if name in ('cold run', 'warm run'):
+        return indexer_stage(corpus, args, tmp, resume=name == 'warm run')
+    run = {'listing': listing_stage, 'fetch': fetch_stage, 'match': match_stage, 'write': write_stage}
+    return run[name](corpus, args, tmp)
+
+
+def measure(name, argv, tmp):
+    """Run one stage in a child process and return (row, metrics report).
+
+    A fresh process per stage, as in bench_output.py, since ru_maxrss only
+    ever grows: measured in one process, each stage would report the
+    highest peak of every stage before it.
+    """
+    result = subprocess.run(
+        [sys.executable, __file__, *argv, '--stage', name, '--workdir', str(tmp)],
+        capture_output=True, text=True, check=True,
+    )
+    child = json.loads(result.stdout.splitlines()[-1])
+    return child['row'], child['metrics']
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against a baseline result set."""
+    problems = []
+    for name, old in baseline.get('stages', {}).items():
+        new = results['stages'].get(name)
+        if new is None:
+            continue
+        if new['videos_per_s'] < old['videos_per_s'] * (1 - tolerance):
+            problems.append(f"{name}: {new['videos_per_s']} videos/s, baseline {old['videos_per_s']}")
+        if old.get('matches') is not None and new['matches'] != old['matches']:
+            problems.append(f"{name}: {new['matches']} matches, baseline {old['matches']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline end-to-end indexer benchmark')
+    parser.add_argument('--channels', type=int, default=4)
+    parser.add_argument('--videos', type=int, default=250, help='videos per channel')
+    parser.add_argument('--segments', type=int, default=300, help='caption lines per video')
+    parser.add_argument('--list-latency', type=float, default=0.02, help='seconds per listing page')
+    parser.add_argument('--fetch-latency', type=float, default=0.01, help='seconds per transcript')
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--block-rate', type=float, default=0.0)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    parser.add_argument('--baseline', type=Path, help='fail on regressions against these results')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed fractional drop in videos/s against the baseline')
+    # Used by measure() to run a single stage in a child process
+    parser.add_argument('--stage', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', type=Path, help=argparse.SUPPRESS)
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+
+    # The same seed in every process, so each child rebuilds the same corpus
+    corpus = synthetic_corpus(ALL_PLAYERS, args.channels, args.videos, args.segments, aliases=ALIASES)
+    if args.stage:
+        row = run_stage(args.stage, corpus, args, args.workdir)
+        print(json.dumps({'row': row, 'metrics': METRICS.report()}))
+        return 0
+
+    total = sum(len(uploads) for uploads in corpus['videos'].values())
+    print(f"Replay corpus: {args.channels} channels, {total:,} videos, {args.segments} lines each")
+
+    stages, metrics = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in STAGES:
+            stages[name], metrics[name] = measure(name, argv, tmp)
+    results = {'corpus': {'channels': args.channels, 'videos': total, 'segments': args.segments},
+               'stages': stages, 'metrics': metrics}
+
+    print(f"{'stage':>9} {'seconds':>8} {'videos':>7} {'videos/s':>9} {'matches/s':>10} "
+          f"{'hit rate':>9} {'peak RSS MB':>12}")
+    for name, row in stages.items():
+        matches = f"{row['matches_per_s']:,.0f}" if row['matches_per_s'] is not None else '-'
+        hit_rate = f"{row['cache_hit_rate']:.1%}" if 'cache_hit_rate' in row else '-'
+        print(f"{name:>9} {row['seconds']:>8.2f} {row['videos']:>7,} {row['videos_per_s']:>9,.1f} "
+              f"{matches:>10} {hit_rate:>9} {row['peak_rss_mb']:>12.0f}")
+    counters = {}
+    for report in metrics.values():
+        for counter, value in report['counters'].items():
+            counters[counter] = counters.get(counter, 0) + value
+    print(f"Fetch failures: {stages['fetch']['failures']}, "
+          f"warm run fetches: {stages['warm run']['fetches']}, "
+          f"quota units: {counters.get('quota_units', 0)}, retries: {counters.get('fetch_retries', 0)}, "
+          f"bytes written: {counters.get('bytes_written', 0):,}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        problems = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Parallel Re-match Benchmark
+Stores a synthetic corpus of transcripts, re-matches it with 1 to N worker
+processes through main.rematch_corpus, and reports videos/s and speedup
+over one process. Each run's mentions.json must be byte-identical to the
+single-process one.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cache import VideoCache
+from export import LEGACY_NAME, write_output
+from main import ALIASES, ALL_PLAYERS, ROSTER, cached_videos, rematch_corpus
+from replay import synthetic_corpus
+from transcripts import TranscriptStore
+
+
+def fill(corpus, cache, store):
+    with cache.batch():
+        for name, channel_id in corpus['channels'].items():
+            for video in corpus['videos'][channel_id]:
+                transcript = corpus['transcripts'][video['id']]
+                if transcript is None:
+                    continue
+                store.put(video['id'], transcript)
+                cache.put(video['id'], {**video, 'hash': '', 'channel': name, 'mentions': {}})
+
+
+def output_digest(cache, channels, out_dir):
+    all_data = {'lastUpdated': '', 'channels': list(channels), 'players': ALL_PLAYERS,
+                'videos': cached_videos(cache, channels)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_output(all_data, legacy=True, data_dir=out_dir)
+    return hashlib.sha256((out_dir / LEGACY_NAME).read_bytes()).hexdigest()
+
+
+def parent_seconds(cache, store):
+    """Time the part of a re-match that stays in the parent: reading blobs, updating the cache."""
+    mentions = {video_id: entry['mentions'] for video_id, entry in cache.entries()}
+    start = time.perf_counter()
+    with cache.batch():
+        for video_id, blob in store.blobs():
+            if video_id in cache:
+                cache.update(video_id, mentions=mentions[video_id], roster=ROSTER)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parallel re-match scaling benchmark')
+    parser.add_argument('--videos', type=int, default=2000)
+    parser.add_argument('--segments', type=int, default=400, help='caption lines per video')
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1),
+                        help='largest worker count to try')
+    args = parser.parse_args(argv)
+
+    counts = [1]
+    while counts[-1] * 2 <= args.workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != args.workers:
+        counts.append(args.workers)
+
+    corpus = synthetic_corpus(ALL_PLAYERS, channel_count=4, videos_per_channel=args.videos // 4,
+                              segments=args.segments, missing_rate=0, aliases=ALIASES)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = VideoCache(tmp / 'cache.db', None)
+        store = TranscriptStore(tmp / 'transcripts.db')
+        fill(corpus, cache, store)
+        print(f"{len(store):,} stored transcripts, {args.segments} lines each, "
+              f"{os.cpu_count()} CPUs")
+        print(f"{'workers':>7} {'seconds':>8} {'videos/s':>9} {'speedup':>8} {'identical':>10}")
+
+        baseline = reference = None
+        for workers in counts:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rematch_corpus(cache, store, workers=workers)
+            elapsed = time.perf_counter() - start
+            digest = output_digest(cache, corpus['channels'], tmp / f"out{workers}")
+            if baseline is None:
+                baseline, reference = elapsed, digest
+            print(f"{workers:>7} {elapsed:>8.2f} {len(store) / elapsed:>9,.0f} "
+                  f"{baseline / elapsed:>7.2f}x {str(digest == reference):>10}")
+            if digest != reference:
+                return 1
+        serial = parent_seconds(cache, store) / baseline
+        print(f"Parent-side work is {serial:.0%} of a single-process run, "
+              f"so 16 workers give at most {1 / (serial + (1 - serial) / 16):.1f}x")
+        store.close()
+        cache.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Retry Scheduler Benchmark
+Simulates two weeks of indexing runs over videos that were first fetched
+without a transcript, each with a hidden outcome drawn per failure kind
+(captions that appear some hours after upload, rate limits that clear,
+errors that may persist, captions that stay disabled). Every run may spend
+a fixed budget of fetches. Compares the cache's retry queue (exponential
+waits, likeliest first) with a blind refetch of random missing videos by
+transcripts recovered and fetches spent.
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+from cache import VideoCache
+from fetcher import DISABLED, ERROR, RATE_LIMITED, UNAVAILABLE
+
+# failure: (share of videos, chance the transcript ever appears, mean hours until it does)
+SCENARIO = {
+    UNAVAILABLE: (0.6, 0.8, 12),
+    RATE_LIMITED: (0.2, 0.98, 1),
+    ERROR: (0.15, 0.5, 24),
+    DISABLED: (0.05, 0.03, 72),
+}
+
+
+def make_videos(count, start, rng):
+    """Return {video_id: (failure, time the transcript appears or None)}."""
+    kinds = list(SCENARIO)
+    weights = [SCENARIO[kind][0] for kind in kinds]
+    videos = {}
+    for i in range(count):
+        failure = rng.choices(kinds, weights)[0]
+        _, chance, hours = SCENARIO[failure]
+        ready = start + timedelta(hours=rng.expovariate(1 / hours)) if rng.random() < chance else None
+        videos[f"miss{i:05d}"] = (failure, ready)
+    return videos
+
+
+def fetch(videos, video_id, now):
+    failure, ready = videos[video_id]
+    return ready is not None and ready <= now, failure
+
+
+def simulate(videos, start, runs, interval, budget, scheduled, seed=0):
+    """Return (recovered, fetches, recovered per run) for one policy."""
+    rng = random.Random(seed)
+    cache = VideoCache(':memory:', None)
+    with cache.batch():
+        for video_id, (failure, _) in videos.items():
+            cache.put(video_id, {'title': video_id, 'date': start.date().isoformat(), 'channel': 'Sim'})
+            cache.record_failure(video_id, failure, start)
+    missing = set(videos)
+    fetches = 0
+    timeline = []
+    for run in range(1, runs + 1):
+        now = start + run * interval
+        if scheduled:
+            picks = [video['id'] for video in cache.due_retries(budget, now=now)]
+        else:
+            picks = rng.sample(sorted(missing), min(budget, len(missing)))
+        with cache.batch():
+            for video_id in picks:
+                fetches += 1
+                found, failure = fetch(videos, video_id, now)
+                if found:
+                    missing.discard(video_id)
+                    cache.clear_failure(video_id)
+                else:
+                    cache.record_failure(video_id, failure, now)
+        timeline.append(len(videos) - len(missing))
+    cache.close()
+    return len(videos) - len(missing), fetches, timeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Retry queue vs blind refetch simulation')
+    parser.add_argument('--videos', type=int, default=1000, help='videos first fetched without a transcript')
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--runs-per-day', type=int, default=4)
+    parser.add_argument('--budget', type=int, default=25, help='fetches per run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = datetime(2025, 1, 1)
+    videos = make_videos(args.videos, start, random.Random(args.seed))
+    recoverable = sum(ready is not None for _, ready in videos.values())
+    runs = args.days * args.runs_per_day
+    interval = timedelta(hours=24 / args.runs_per_day)
+    print(f"{args.videos:,} videos without transcripts, {recoverable:,} recoverable; "
+          f"{runs} runs of {args.budget} fetches")
+
+    print(f"{'policy':>9} {'recovered':>10} {'fetches':>8} {'per fetch':>10} {'after 1 day':>12} {'after 3 days':>13}")
+    for name, scheduled in (('scheduled', True), ('blind', False)):
+        recovered, fetches, timeline = simulate(videos, start, runs, interval, args.budget, scheduled, args.seed)
+        day = args.runs_per_day
+        print(f"{name:>9} {recovered:>10,} {fetches:>8,} {recovered / fetches if fetches else 0:>10.2f} "
+              f"{timeline[min(day, runs) - 1]:>12,} {timeline[min(3 * day, runs) - 1]:>13,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
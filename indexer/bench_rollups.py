@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Rollup Maintenance Benchmark
+Caches a synthetic corpus video by video, with the rollups kept up to date
+on every write, then re-matches a sample of videos and reports the cost
+per video of the incremental update against rebuilding the rollups from
+every entry. Checks that the incremental rollups equal a rebuild, and
+compares the size of the exported rollups.json with the shards it
+summarizes.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_mentions import make_entries
+from cache import VideoCache
+from export import PLAYER_DIR, ROLLUPS_NAME, write_output
+
+
+def snapshot(cache):
+    return {key: sorted(rows) for key, rows in cache.rollups().items()}
+
+
+def directory_size(path):
+    return sum(file.stat().st_size for file in Path(path).iterdir())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental vs rebuilt analytics rollups')
+    parser.add_argument('--videos', type=int, default=20000)
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--updates', type=int, default=1000, help='videos re-matched after the fill')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = VideoCache(tmp / 'cache.db', None)
+
+        start = time.perf_counter()
+        videos = []
+        with cache.batch():
+            for entry in make_entries(args.videos, args.players):
+                video = json.loads(entry)
+                cache.put(video['videoId'], {**video, 'hash': '', 'roster': ''})
+                videos.append((video['videoId'], video['mentions']))
+        fill = time.perf_counter() - start
+
+        # A re-match that moves some mentions to another player
+        players = sorted({player for _, mentions in videos for player in mentions})
+        start = time.perf_counter()
+        with cache.batch():
+            for video_id, mentions in rng.sample(videos, args.updates):
+                moved = {rng.choice(players) if rng.random() < 0.3 else player: hits
+                         for player, hits in mentions.items()}
+                cache.update(video_id, mentions=moved)
+        update = (time.perf_counter() - start) / args.updates
+
+        incremental = snapshot(cache)
+        start = time.perf_counter()
+        cache.rebuild_rollups()
+        rebuild = time.perf_counter() - start
+        identical = snapshot(cache) == incremental
+
+        print(f"{args.videos:,} videos, {len(incremental['weeks']):,} player-week rows, "
+              f"{len(incremental['channels']):,} player-channel rows, {len(incremental['pairs']):,} pairs")
+        print(f"Fill with rollups: {fill:.2f}s ({fill / args.videos * 1000:.3f} ms/video)")
+        print(f"Incremental update: {update * 1000:.3f} ms/video, full rebuild: {rebuild:.2f}s "
+              f"({rebuild / update:,.0f}x one update)")
+
+        all_data = {'lastUpdated': '', 'channels': [], 'players': [], 'videos': (
+            {'videoId': video_id, **entry} for video_id, entry in cache.entries(with_mentions=True, newest_first=True)
+        )}
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_output(all_data, data_dir=tmp / 'out', rollups=cache.rollups())
+        print(f"{ROLLUPS_NAME}: {(tmp / 'out' / ROLLUPS_NAME).stat().st_size / 1024:,.0f} KB, "
+              f"player shards: {directory_size(tmp / 'out' / PLAYER_DIR) / 1024:,.0f} KB")
+        print(f"Incremental rollups match a rebuild: {identical}")
+        cache.close()
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Roster Sync Benchmark
+Matches a synthetic corpus, then edits the player list the way a user
+would (dropping players and an alias, then adding them back, then
+switching fuzzy matching on and off) and brings one cache up to date with main.sync_roster and a copy with a full
+main.rematch_corpus. Reports the time of each and exits 1 unless both
+leave every video with the same mentions.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import main as indexer
+from cache import VideoCache
+from disambiguate import RL_VOCABULARY
+from matcher import alias_map
+from players import ALL_PLAYERS, ALIASES
+from replay import CAPTION_WORDS, synthetic_corpus
+from transcripts import TranscriptStore
+
+# Players dropped and re-added, and aliases dropped from the players kept
+DROPPED = ['Kash', 'Scrub Killa']
+DROPPED_ALIASES = {'Firstkiller': ['First']}
+
+# Filler without Rocket League words, so whether a common-word name is kept
+# turns on the other players around it
+FILLER = [word for word in CAPTION_WORDS if word not in RL_VOCABULARY]
+
+
+def use_roster(players, aliases, fuzzy=False):
+    """Point main at a different player list, as if players.py had been edited."""
+    indexer.ALL_PLAYERS = players
+    indexer.ALIASES = aliases
+    indexer.NAMES = alias_map(players, aliases)
+    indexer.use_fuzzy(fuzzy)
+
+
+def rosters():
+    """Yield (label, players, aliases, fuzzy) for each edit, ending on the full roster."""
+    aliases = {
+        player: [name for name in names if name not in DROPPED_ALIASES.get(player, ())]
+        for player, names in ALIASES.items() if player not in DROPPED
+    }
+    players = [player for player in ALL_PLAYERS if player not in DROPPED]
+    yield f"drop {', '.join(DROPPED)} and an alias", players, {k: v for k, v in aliases.items() if v}, False
+    yield 'add them back', ALL_PLAYERS, ALIASES, False
+    yield 'fuzzy matching on', ALL_PLAYERS, ALIASES, True
+    yield 'fuzzy matching off', ALL_PLAYERS, ALIASES, False
+
+
+def fill(corpus, path):
+    cache = VideoCache(path / 'cache.db', None)
+    store = TranscriptStore(path / 'transcripts.db')
+    with cache.batch():
+        for name, channel_id in corpus['channels'].items():
+            for video in corpus['videos'][channel_id]:
+                transcript = corpus['transcripts'][video['id']]
+                if transcript is None:
+                    continue
+                store.put(video['id'], transcript)
+                cache.put(video['id'], {**video, 'hash': '', 'channel': name, 'mentions': {}})
+    with contextlib.redirect_stdout(io.StringIO()):
+        indexer.rematch_corpus(cache, store)
+    return cache, store
+
+
+def mentions(cache):
+    return {video_id: entry['mentions'] for video_id, entry in cache.entries()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental roster sync vs full re-match')
+    parser.add_argument('--videos', type=int, default=400)
+    parser.add_argument('--segments', type=int, default=300, help='caption lines per video')
+    parser.add_argument('--mention-rate', type=float, default=0.02,
+                        help='share of caption lines naming a player or alias')
+    args = parser.parse_args(argv)
+
+    # Plant aliases too, so alias and overlap changes have hits to act on
+    names = list(alias_map(ALL_PLAYERS, ALIASES))
+    corpus = synthetic_corpus(names, channel_count=4, videos_per_channel=args.videos // 4,
+                              segments=args.segments, mention_rate=args.mention_rate,
+                              missing_rate=0, aliases=ALIASES, words=FILLER)
+    identical = True
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'sync').mkdir()
+        (tmp / 'full').mkdir()
+        use_roster(ALL_PLAYERS, ALIASES)
+        synced, synced_store = fill(corpus, tmp / 'sync')
+        full, full_store = fill(corpus, tmp / 'full')
+
+        print(f"{len(synced_store):,} stored transcripts, {args.segments} lines each")
+        print(f"{'change':>36} {'sync s':>7} {'rematch s':>10} {'mentions':>9} {'identical':>10}")
+        for label, players, aliases, fuzzy in rosters():
+            use_roster(players, aliases, fuzzy)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                indexer.sync_roster(synced, synced_store)
+                sync = time.perf_counter() - start
+                start = time.perf_counter()
+                indexer.rematch_corpus(full, full_store)
+                rematch = time.perf_counter() - start
+
+            expected = mentions(full)
+            same = mentions(synced) == expected
+            identical = identical and same
+            total = sum(len(hits) for video in expected.values() for hits in video.values())
+            print(f"{label:>36} {sync:>7.2f} {rematch:>10.2f} {total:>9,} {str(same):>10}")
+
+        use_roster(ALL_PLAYERS, ALIASES)
+        for closing in (synced_store, full_store, synced, full):
+            closing.close()
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+Compares a full scan of every video's mentions (what App.jsx used to do on
+each keystroke) with a prefix-table lookup plus posting-list merge on a
+synthetic 50k-video dataset.
+"""
+
+import random
+import statistics
+import string
+import sys
+import time
+
+from export import build_shards
+from search_index import build_search_index, search
+
+
+def make_dataset(video_count, player_count, rng):
+    players = sorted({
+        ''.join(rng.choices(string.ascii_letters, k=rng.randint(4, 10)))
+        for _ in range(player_count)
+    })
+    videos = []
+    for i in range(video_count):
+        mentions = {}
+        for player in rng.sample(players, rng.randint(1, 6)):
+            mentions[player] = [
+                {'time': '', 'seconds': rng.randint(0, 3600), 'text': 'caption text'}
+                for _ in range(rng.randint(1, 4))
+            ]
+        videos.append({
+            'videoId': f"vid{i:06d}",
+            'title': f"Video {i}",
+            'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'thumbnail': '',
+            'channel': f"Channel {i % 25}",
+            'mentions': mentions,
+        })
+    videos.sort(key=lambda v: (v['date'], v['videoId']), reverse=True)
+    return {
+        'lastUpdated': '',
+        'channels': [f"Channel {i}" for i in range(25)],
+        'players': players,
+        'videos': videos,
+    }
+
+
+def scan_query(all_data, query):
+    q = query.lower().strip()
+    results = []
+    for video in all_data['videos']:
+        matching = {p: m for p, m in video['mentions'].items() if q in p.lower()}
+        if matching:
+            results.append((video['videoId'], matching))
+    return results
+
+
+def index_query(index, manifest, shards, query):
+    videos = {}
+    for player_id in search(index, query):
+        name = manifest['players'][player_id]
+        for row in shards.get(player_id, []):
+            videos.setdefault(row[0], (row[2], {}))[1][name] = row[5]
+    return sorted(videos.items(), key=lambda item: (item[1][0], item[0]), reverse=True)
+
+
+def measure(fn, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.mean(times), times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main(video_count=50000, player_count=2000, query_count=200):
+    rng = random.Random(7)
+    print(f"Building {video_count:,} videos with {player_count:,} players...")
+    all_data = make_dataset(video_count, player_count, rng)
+
+    start = time.perf_counter()
+    manifest, shards, _ = build_shards(all_data)
+    index = build_search_index(manifest['players'], manifest['mentionCounts'], manifest['videoCounts'])
+    print(f"Index build: {time.perf_counter() - start:.2f}s, {len(index['prefixes']):,} prefixes")
+
+    queries = [rng.choice(all_data['players'])[:rng.randint(2, 6)] for _ in range(query_count)]
+
+    print(f"{'method':>8} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    scan = measure(lambda q: scan_query(all_data, q), queries[:20])
+    print(f"{'scan':>8} {scan[0]:>9.2f} {scan[1]:>8.2f} {scan[2]:>8.2f}")
+    indexed = measure(lambda q: index_query(index, manifest, shards, q), queries)
+    print(f"{'index':>8} {indexed[0]:>9.3f} {indexed[1]:>8.3f} {indexed[2]:>8.3f}")
+    print(f"Speedup (mean): {scan[0] / indexed[0]:.0f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Query Service Load Test
+Fills a video cache with a synthetic corpus, starts serve.py's HTTP server
+on it in this process (or targets a running one with --url), and sends a
+mix of player, prefix, channel and date-range queries from several client
+threads. Players are drawn with a skewed distribution, so popular queries
+repeat as they would from real users. Reports queries/s, p50/p99 latency
+and the query cache hit rate, then adds a video to the cache and times how
+long the server takes to pick it up.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from bench_mentions import make_entries
+from cache import VideoCache
+from serve import MentionService, make_server
+
+
+def fill_cache(path, video_count, player_count):
+    cache = VideoCache(path, None)
+    with cache.batch():
+        for entry in make_entries(video_count, player_count):
+            video = json.loads(entry)
+            cache.put(video['videoId'], {**video, 'hash': '', 'roster': ''})
+    cache.close()
+
+
+def make_queries(count, players, channels, seed=0):
+    """Return request paths: mostly player lookups, skewed towards a few popular players."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(players))]
+    queries = []
+    for _ in range(count):
+        roll = rng.random()
+        player = rng.choices(players, weights)[0]
+        if roll < 0.5:
+            params = {'player': player, 'page': rng.choice((1, 1, 1, 2, 3))}
+        elif roll < 0.7:
+            params = {'prefix': player[:rng.randint(2, 8)], 'per_page': 10}
+        elif roll < 0.85:
+            params = {'player': player, 'since': f"2025-{rng.randint(1, 12):02d}-01"}
+        elif roll < 0.95:
+            params = {'channel': rng.choice(channels), 'page': rng.randint(1, 5)}
+            queries.append('/mentions?' + urlencode(params))
+            continue
+        else:
+            queries.append('/players?' + urlencode({'prefix': player[:rng.randint(1, 4)]}))
+            continue
+        queries.append('/mentions?' + urlencode(params))
+    return queries
+
+
+def get(url):
+    with urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+        status = response.status
+    return time.perf_counter() - start, status
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def load_test(base, queries, clients):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(timed_get, (base + query for query in queries)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(seconds for seconds, _ in results)
+    errors = sum(status != 200 for _, status in results)
+    return elapsed, latencies, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the local query service')
+    parser.add_argument('--url', help='query a running server instead of starting one')
+    parser.add_argument('--videos', type=int, default=20000)
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client threads')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = service = None
+        base = args.url
+        if not base:
+            path = Path(tmp) / 'video_cache.db'
+            fill_cache(path, args.videos, args.players)
+            service = MentionService(path)
+            server = make_server(service, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+        base = base.rstrip('/')
+
+        players = [player['name'] for player in get(base + '/players?limit=100')['players']]
+        channels = [channel['name'] for channel in get(base + '/channels')['channels']]
+        queries = make_queries(args.queries, players, channels)
+        before = get(base + '/status')['queryCache']
+
+        elapsed, latencies, errors = load_test(base, queries, args.clients)
+        after = get(base + '/status')['queryCache']
+        lookups = (after['hits'] - before['hits']) + (after['misses'] - before['misses'])
+        hit_rate = (after['hits'] - before['hits']) / lookups if lookups else 0.0
+        print(f"{len(queries):,} queries from {args.clients} clients in {elapsed:.2f}s")
+        print(f"{'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cache hits':>11} {'errors':>7}")
+        print(f"{len(queries) / elapsed:>10,.0f} {percentile(latencies, 0.5) * 1000:>8.2f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.2f} {latencies[-1] * 1000:>8.2f} "
+              f"{hit_rate:>11.1%} {errors:>7}")
+
+        if service:
+            watcher = threading.Event()
+            threading.Thread(target=service.watch, args=(0.1, watcher), daemon=True).start()
+            videos = get(base + '/status')['videos']
+            cache = VideoCache(path, None)
+            cache.put('reload-check', {
+                'title': 'Reload check', 'date': '2099-01-01', 'thumbnail': '', 'channel': channels[0],
+                'mentions': {players[0]: [{'time': '0:00', 'seconds': 0, 'text': players[0]}]},
+                'hash': '', 'roster': '',
+            })
+            cache.close()
+            start = time.perf_counter()
+            while get(base + '/status')['videos'] == videos and time.perf_counter() - start < 30:
+                time.sleep(0.05)
+            print(f"New video served {time.perf_counter() - start:.2f}s after it was cached")
+            watcher.set()
+            server.shutdown()
+            server.server_close()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
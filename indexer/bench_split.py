@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Split-Caption Benchmark
+Plants player mentions in synthetic transcripts, splitting a share of the
+multi-word names across two caption lines the way auto-captions do, then
+compares recall and throughput of line-at-a-time matching with the
+cross-segment scan in find_mentions.
+"""
+
+import random
+import sys
+import time
+
+from bench_matcher import WORDS, make_names
+from fetcher import Snippet
+from matcher import find_mentions, get_matcher
+
+SPLIT_RATE = 0.3
+
+
+def make_transcripts(names, count, segments, rng):
+    """Return transcripts and the planted (transcript, segment, name) set."""
+    multi = [name for name in names if ' ' in name]
+    transcripts = []
+    planted = set()
+    for t in range(count):
+        lines = [rng.choices(WORDS, k=rng.randint(4, 9)) for _ in range(segments)]
+        for i in range(segments - 1):
+            if rng.random() >= 0.1:
+                continue
+            name = rng.choice(multi)
+            first, rest = name.split(' ', 1)
+            if rng.random() < SPLIT_RATE:
+                lines[i].append(first)
+                lines[i + 1].insert(0, rest)
+            else:
+                lines[i].insert(rng.randrange(len(lines[i]) + 1), name)
+            planted.add((t, i, name))
+        transcripts.append([
+            Snippet(' '.join(words), i * 3.0, 3.0) for i, words in enumerate(lines)
+        ])
+    return transcripts, planted
+
+
+def line_at_a_time(transcript, matcher):
+    """The previous find_mentions: each line matched on its own."""
+    found = {}
+    for entry in transcript:
+        for name in matcher.names_in(entry.text):
+            found.setdefault(name, []).append({'seconds': int(entry.start)})
+    return found
+
+
+def recall(results, planted):
+    found = set()
+    for t, mentions in enumerate(results):
+        for name, hits in mentions.items():
+            for hit in hits:
+                found.add((t, hit['seconds'] // 3, name))
+    return len(planted & found) / len(planted)
+
+
+def main(name_count=2000, transcript_count=300, segments=400):
+    rng = random.Random(11)
+    names = make_names(name_count, rng)
+    transcripts, planted = make_transcripts(names, transcript_count, segments, rng)
+    matcher = get_matcher(names)
+    total = transcript_count * segments
+    print(f"{total:,} segments, {len(planted):,} planted mentions "
+          f"({SPLIT_RATE:.0%} of them split across lines), {name_count:,} names")
+
+    print(f"{'method':>16} {'recall':>7} {'segments/s':>12}")
+    baseline = None
+    for label, fn in (('line-at-a-time', line_at_a_time), ('cross-segment', find_mentions)):
+        start = time.perf_counter()
+        results = [fn(transcript, matcher) for transcript in transcripts]
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed
+        baseline = baseline or rate
+        print(f"{label:>16} {recall(results, planted):>7.1%} {rate:>12,.0f}")
+    print(f"Throughput cost: {1 - rate / baseline:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,520 @@
+"""
+SQLite-backed video cache.
+Replaces the monolithic video_cache.json: entries are written (and
+committed) one video at a time in WAL mode, and can be looked up by video
+ID or channel without loading the whole history. Analytics rollups (see
+rollups.py) are updated in the same transaction as each video.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from retry import schedule
+from rollups import contribution
+
+CACHE_DIR = Path(__file__).parent / 'cache'
+CACHE_DB_PATH = CACHE_DIR / 'video_cache.db'
+LEGACY_JSON_PATH = CACHE_DIR / 'video_cache.json'
+
+STATS = ('total_processed', 'cache_hits', 'new_videos')
+
+# Entry fields the rollups depend on
+ROLLUP_FIELDS = {'channel', 'date', 'mentions'}
+
+# Entry fields stored as columns; 'mentions' is stored as compact JSON
+COLUMNS = (
+    'hash', 'title', 'date', 'thumbnail', 'channel', 'duration',
+    'roster', 'processed_date', 'metadata_date', 'mentions'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    hash TEXT,
+    title TEXT,
+    date TEXT,
+    thumbnail TEXT,
+    channel TEXT,
+    duration INTEGER,
+    roster TEXT,
+    processed_date TEXT,
+    metadata_date TEXT,
+    mentions TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS videos_channel ON videos (channel, date);
+CREATE TABLE IF NOT EXISTS cursors (channel_id TEXT PRIMARY KEY, video_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rosters (fingerprint TEXT PRIMARY KEY, names TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS last_check (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS pending (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    title TEXT,
+    date TEXT,
+    thumbnail TEXT,
+    queued_date TEXT
+);
+CREATE INDEX IF NOT EXISTS pending_channel ON pending (channel_id);
+CREATE TABLE IF NOT EXISTS failures (
+    video_id TEXT PRIMARY KEY,
+    failure TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    last_attempt TEXT,
+    next_retry TEXT,
+    priority REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS failures_due ON failures (next_retry);
+CREATE TABLE IF NOT EXISTS rollup_mentions (
+    player TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    week TEXT NOT NULL,
+    mentions INTEGER NOT NULL,
+    videos INTEGER NOT NULL,
+    PRIMARY KEY (player, channel, week)
+);
+CREATE TABLE IF NOT EXISTS rollup_pairs (
+    player TEXT NOT NULL,
+    other TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    videos INTEGER NOT NULL,
+    PRIMARY KEY (player, other, channel)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT,
+    started TEXT,
+    checkpoint TEXT,
+    finished TEXT,
+    status TEXT,
+    processed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def dump_mentions(mentions):
+    return json.dumps(mentions, ensure_ascii=False, separators=(',', ':'))
+
+
+class VideoCache:
+    """Transactional store of processed videos, cursors, rosters and stats.
+
+    Safe to share between threads: every statement runs under one lock.
+    Each write commits immediately unless it happens inside batch().
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, legacy_path=LEGACY_JSON_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.batching = 0
+
+        if self.get_last_check('rollups_built') is None:
+            self.rebuild_rollups()
+
+        if legacy_path and Path(legacy_path).exists() and not len(self):
+            self.migrate_json(Path(legacy_path))
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            if not self.batching:
+                self.conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _iter_query(self, sql, params=(), size=500):
+        """Yield rows a chunk at a time instead of fetching them all."""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+    @contextmanager
+    def batch(self):
+        """Group many writes into one transaction."""
+        with self.lock:
+            self.batching += 1
+            try:
+                yield self
+            finally:
+                self.batching -= 1
+                if not self.batching:
+                    self.conn.commit()
+
+    # Videos
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM videos')[0][0]
+
+    def __contains__(self, video_id):
+        return bool(self._query('SELECT 1 FROM videos WHERE video_id = ?', (video_id,)))
+
+    def _entry(self, row):
+        entry = dict(zip(COLUMNS, row[1:]))
+        entry['mentions'] = json.loads(entry['mentions'])
+        return entry
+
+    def get(self, video_id):
+        """Return the cache entry for a video, or None."""
+        rows = self._query(
+            f"SELECT video_id, {', '.join(COLUMNS)} FROM videos WHERE video_id = ?", (video_id,)
+        )
+        return self._entry(rows[0]) if rows else None
+
+    def put(self, video_id, entry):
+        """Insert or replace a video's entry."""
+        values = [entry.get(column) for column in COLUMNS]
+        values[-1] = dump_mentions(entry.get('mentions') or {})
+        with self.batch():
+            old = self._rollup_state(video_id)
+            self._execute(
+                f"INSERT OR REPLACE INTO videos (video_id, {', '.join(COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in COLUMNS)})",
+                [video_id, *values]
+            )
+            self._roll(old, {'channel': entry.get('channel'), 'date': entry.get('date'), 'mentions': values[-1]})
+
+    def update(self, video_id, **fields):
+        """Update some fields of an existing entry."""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown cache fields: {sorted(unknown)}")
+        if 'mentions' in fields:
+            fields['mentions'] = dump_mentions(fields['mentions'])
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with self.batch():
+            old = self._rollup_state(video_id) if ROLLUP_FIELDS & set(fields) else None
+            self._execute(
+                f"UPDATE videos SET {assignments} WHERE video_id = ?", [*fields.values(), video_id]
+            )
+            if old:
+                self._roll(old, {**old, **{key: fields[key] for key in ROLLUP_FIELDS & set(fields)}})
+
+    def entries(self, channels=None, with_mentions=False, newest_first=False):
+        """Yield (video_id, entry) pairs, optionally for some channels only.
+
+        Rows are streamed; newest_first orders them by (date, video_id)
+        descending, the output order, with SQLite doing the sorting.
+        """
+        sql = f"SELECT video_id, {', '.join(COLUMNS)} FROM videos WHERE 1=1"
+        params = ()
+        if channels is not None:
+            channels = list(channels)
+            sql += f" AND channel IN ({', '.join('?' for _ in channels)})"
+            params = channels
+        if with_mentions:
+            sql += " AND mentions != '{}'"
+        if newest_first:
+            sql += ' ORDER BY date DESC, video_id DESC'
+        for row in self._iter_query(sql, params):
+            yield row[0], self._entry(row)
+
+    def video_ids(self, channels=None, where='', params=()):
+        """Return video IDs matching optional channel and SQL filters."""
+        sql = 'SELECT video_id FROM videos WHERE 1=1'
+        if channels is not None:
+            channels = list(channels)
+            sql += f" AND channel IN ({', '.join('?' for _ in channels)})"
+            params = (*channels, *params)
+        if where:
+            sql += f" AND ({where})"
+        return [row[0] for row in self._query(sql, params)]
+
+    # Rollups
+
+    def _rollup_state(self, video_id):
+        """Return the fields of an entry the rollups depend on, mentions as stored JSON."""
+        rows = self._query('SELECT channel, date, mentions FROM videos WHERE video_id = ?', (video_id,))
+        return dict(zip(('channel', 'date', 'mentions'), rows[0])) if rows else None
+
+    def _roll(self, old, new):
+        """Replace an entry's contribution to the rollups: old's is removed, new's added."""
+        if old == new:
+            return
+        emptied = ([], [])
+        for state, sign in ((old, -1), (new, 1)):
+            if not state or state['mentions'] == '{}':
+                continue
+            counts, pairs = contribution({**state, 'mentions': json.loads(state['mentions'])})
+            for key, count in counts.items():
+                self._execute(
+                    'INSERT INTO rollup_mentions VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(player, channel, week) DO UPDATE SET '
+                    'mentions = mentions + excluded.mentions, videos = videos + excluded.videos',
+                    (*key, sign * count, sign)
+                )
+            for key in pairs:
+                self._execute(
+                    'INSERT INTO rollup_pairs VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(player, other, channel) DO UPDATE SET videos = videos + excluded.videos',
+                    (*key, sign)
+                )
+            if sign < 0:
+                emptied = (counts, pairs)
+        for key in emptied[0]:
+            self._execute(
+                'DELETE FROM rollup_mentions WHERE player = ? AND channel = ? AND week = ? AND videos <= 0', key
+            )
+        for key in emptied[1]:
+            self._execute(
+                'DELETE FROM rollup_pairs WHERE player = ? AND other = ? AND channel = ? AND videos <= 0', key
+            )
+
+    def rebuild_rollups(self):
+        """Recompute the rollups from every entry; only needed for caches that predate them."""
+        with self.batch():
+            self._execute('DELETE FROM rollup_mentions')
+            self._execute('DELETE FROM rollup_pairs')
+            rows = self._iter_query("SELECT channel, date, mentions FROM videos WHERE mentions != '{}'")
+            for channel, day, mentions in rows:
+                self._roll(None, {'channel': channel, 'date': day, 'mentions': mentions})
+            self.set_last_check('rollups_built', datetime.utcnow().isoformat())
+
+    def rollups(self, channels=None):
+        """Return rollup rows summed over weeks or channels, optionally for some channels only.
+
+        {'weeks': [(player, week, mentions, videos)], 'channels': [(player,
+        channel, mentions, videos)], 'pairs': [(player, other, videos)]}
+        """
+        where = ''
+        params = ()
+        if channels is not None:
+            params = tuple(channels)
+            where = f" WHERE channel IN ({', '.join('?' for _ in params)})"
+        return {
+            'weeks': self._query(
+                f'SELECT player, week, SUM(mentions), SUM(videos) FROM rollup_mentions{where} '
+                'GROUP BY player, week ORDER BY player, week', params
+            ),
+            'channels': self._query(
+                f'SELECT player, channel, SUM(mentions), SUM(videos) FROM rollup_mentions{where} '
+                'GROUP BY player, channel ORDER BY player, channel', params
+            ),
+            'pairs': self._query(
+                f'SELECT player, other, SUM(videos) FROM rollup_pairs{where} '
+                'GROUP BY player, other ORDER BY player, other', params
+            ),
+        }
+
+    # Cursors, rosters, stats
+
+    def get_cursor(self, channel_id):
+        rows = self._query('SELECT video_id FROM cursors WHERE channel_id = ?', (channel_id,))
+        return rows[0][0] if rows else None
+
+    def set_cursor(self, channel_id, video_id):
+        self._execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)', (channel_id, video_id))
+
+    def get_roster(self, fingerprint):
+        rows = self._query('SELECT names FROM rosters WHERE fingerprint = ?', (fingerprint,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put_roster(self, fingerprint, names):
+        self._execute(
+            'INSERT OR REPLACE INTO rosters VALUES (?, ?)',
+            (fingerprint, json.dumps(sorted(set(names)), ensure_ascii=False))
+        )
+
+    def roster_groups(self, current):
+        """Return {fingerprint: [video_id, ...]} for entries not on current."""
+        groups = {}
+        rows = self._query('SELECT roster, video_id FROM videos WHERE roster IS NOT ?', (current,))
+        for fingerprint, video_id in rows:
+            groups.setdefault(fingerprint, []).append(video_id)
+        return groups
+
+    def prune_rosters(self, keep):
+        """Forget name lists that no entry refers to any more."""
+        self._execute(
+            'DELETE FROM rosters WHERE fingerprint != ? AND fingerprint NOT IN '
+            '(SELECT DISTINCT roster FROM videos WHERE roster IS NOT NULL)',
+            (keep,)
+        )
+
+    def get_last_check(self, key):
+        rows = self._query('SELECT value FROM last_check WHERE key = ?', (key,))
+        return rows[0][0] if rows else None
+
+    def set_last_check(self, key, value):
+        self._execute('INSERT OR REPLACE INTO last_check VALUES (?, ?)', (key, value))
+
+    def bump(self, name, amount=1):
+        self._execute(
+            'INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?',
+            (name, amount, amount)
+        )
+
+    def set_stat(self, name, value):
+        self._execute('INSERT OR REPLACE INTO stats VALUES (?, ?)', (name, value))
+
+    def stats(self):
+        counts = dict.fromkeys(STATS, 0)
+        counts.update(self._query('SELECT name, value FROM stats'))
+        return counts
+
+    # Pending queue and run checkpoints
+
+    def add_pending(self, channel_id, videos):
+        """Queue listed videos so an interrupted run can pick them up again."""
+        now = datetime.utcnow().isoformat()
+        with self.batch():
+            for video in videos:
+                self._execute(
+                    'INSERT OR IGNORE INTO pending VALUES (?, ?, ?, ?, ?, ?)',
+                    (video['id'], channel_id, video['title'], video['date'], video['thumbnail'], now)
+                )
+
+    def remove_pending(self, video_id):
+        self._execute('DELETE FROM pending WHERE video_id = ?', (video_id,))
+
+    def pending_videos(self, channel_id=None):
+        """Return queued videos, newest first, optionally for one channel."""
+        sql = 'SELECT video_id, title, date, thumbnail FROM pending'
+        params = ()
+        if channel_id is not None:
+            sql += ' WHERE channel_id = ?'
+            params = (channel_id,)
+        rows = self._query(sql + ' ORDER BY date DESC, video_id', params)
+        return [{'id': r[0], 'title': r[1], 'date': r[2], 'thumbnail': r[3]} for r in rows]
+
+    # Failed fetches and their retry schedule
+
+    def record_failure(self, video_id, failure, when=None):
+        """Count a fetch that found no transcript and schedule its next retry."""
+        when = when or datetime.utcnow()
+        rows = self._query('SELECT attempts FROM failures WHERE video_id = ?', (video_id,))
+        attempts = rows[0][0] + 1 if rows else 1
+        next_retry, priority = schedule(failure, attempts, when)
+        self._execute(
+            'INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?, ?)',
+            (video_id, failure, attempts, when.isoformat(), next_retry, priority)
+        )
+
+    def clear_failure(self, video_id):
+        self._execute('DELETE FROM failures WHERE video_id = ?', (video_id,))
+
+    def due_retries(self, limit, now=None, channels=None):
+        """Return up to limit videos due a retry, likeliest to succeed first.
+
+        Each is a video dict ('id', 'title', 'date', 'thumbnail') plus the
+        cached 'channel', 'duration' and 'metadata_date', and 'failure' and
+        'attempts'. Entries migrated without a channel are never due, since
+        a recovered transcript couldn't be attributed to one.
+        """
+        now = (now or datetime.utcnow()).isoformat()
+        sql = (
+            'SELECT f.video_id, v.title, v.date, v.thumbnail, v.channel, v.duration, v.metadata_date, '
+            'f.failure, f.attempts FROM failures f JOIN videos v USING (video_id) '
+            'WHERE f.next_retry <= ? AND v.channel IS NOT NULL'
+        )
+        params = (now,)
+        if channels is not None:
+            channels = list(channels)
+            sql += f" AND v.channel IN ({', '.join('?' for _ in channels)})"
+            params = (now, *channels)
+        rows = self._query(sql + ' ORDER BY f.priority DESC, f.next_retry LIMIT ?', (*params, limit))
+        keys = ('id', 'title', 'date', 'thumbnail', 'channel', 'duration', 'metadata_date', 'failure', 'attempts')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def untracked_misses(self):
+        """Return (video_id, processed_date) for entries with a channel but no mentions or failure record."""
+        return self._query(
+            "SELECT video_id, processed_date FROM videos WHERE mentions = '{}' AND channel IS NOT NULL "
+            'AND video_id NOT IN (SELECT video_id FROM failures)'
+        )
+
+    def failure_counts(self):
+        """Return {failure: videos} plus 'due' (retry time passed) and 'given_up'.
+
+        'due' counts what due_retries can return, so entries without a
+        channel are left out of it.
+        """
+        counts = dict(self._query('SELECT failure, COUNT(*) FROM failures GROUP BY failure'))
+        counts['due'] = self._query(
+            'SELECT COUNT(*) FROM failures f JOIN videos v USING (video_id) '
+            'WHERE f.next_retry <= ? AND v.channel IS NOT NULL', (datetime.utcnow().isoformat(),)
+        )[0][0]
+        counts['given_up'] = self._query('SELECT COUNT(*) FROM failures WHERE next_retry IS NULL')[0][0]
+        return counts
+
+    def start_run(self, mode):
+        """Record the start of a run and return its ID."""
+        now = datetime.utcnow().isoformat()
+        cursor = self._execute(
+            'INSERT INTO runs (mode, started, checkpoint, status) VALUES (?, ?, ?, ?)',
+            (mode, now, now, 'running')
+        )
+        return cursor.lastrowid
+
+    def checkpoint(self, run_id, processed):
+        """Record run progress and fold the WAL back into the database."""
+        self._execute(
+            'UPDATE runs SET checkpoint = ?, processed = ? WHERE id = ?',
+            (datetime.utcnow().isoformat(), processed, run_id)
+        )
+        with self.lock:
+            self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def finish_run(self, run_id, status, processed=None):
+        now = datetime.utcnow().isoformat()
+        if processed is None:
+            self._execute('UPDATE runs SET finished = ?, status = ? WHERE id = ?', (now, status, run_id))
+        else:
+            self._execute(
+                'UPDATE runs SET finished = ?, status = ?, processed = ? WHERE id = ?',
+                (now, status, processed, run_id)
+            )
+
+    def last_run(self):
+        """Return the most recent run as a dict, or None."""
+        rows = self._query(
+            'SELECT id, mode, started, checkpoint, finished, status, processed '
+            'FROM runs ORDER BY id DESC LIMIT 1'
+        )
+        if not rows:
+            return None
+        return dict(zip(('id', 'mode', 'started', 'checkpoint', 'finished', 'status', 'processed'), rows[0]))
+
+    # Migration
+
+    def migrate_json(self, legacy_path):
+        """Import a legacy video_cache.json, then set it aside."""
+        print(f"Migrating {legacy_path.name} to {self.path.name}")
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        with self.batch():
+            for video_id, entry in data.get('processed_videos', {}).items():
+                self.put(video_id, entry)
+            for channel_id, video_id in data.get('cursors', {}).items():
+                self.set_cursor(channel_id, video_id)
+            for fingerprint, names in data.get('rosters', {}).items():
+                self.put_roster(fingerprint, names)
+            for key, value in data.get('last_check', {}).items():
+                self.set_last_check(key, value)
+            for name, value in data.get('stats', {}).items():
+                self.set_stat(name, value)
+
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + '.migrated'))
+        print(f"Migrated {len(data.get('processed_videos', {}))} videos")
@@ -0,0 +1,122 @@
+"""
+Context filter for names that are also ordinary words.
+Aliases like 'First', 'Memory' or 'Burn' match everyday speech in almost
+every transcript. After matching, each hit on one of them is scored on
+cheap local signals and dropped unless the captions around it look like
+talk about a player.
+"""
+
+from bisect import bisect_left
+
+from matcher import WORD_RE
+
+# Words that make nearby captions look like Rocket League talk
+RL_VOCABULARY = frozenset("""
+    goal goals save saves saved shot shots score scored scores scoring pass passes
+    passing rotation rotations rotate boost demo demos demoed bump bumps kickoff
+    kickoffs aerial aerials flip flips reset resets dribble dribbles dribbling ceiling
+    wavedash redirect redirects ball net car cars team teams teammate teammates
+    opponent opponents match matches series rlcs ranked ssl grand champ champion champions
+    gc pro pros player players tournament lan worlds major scrim scrims 1v1 2v2 3v3
+    overtime clip clips mechanics freestyle octane dominus fennec rocket league
+""".split())
+
+# Captions either side of a hit that count as its context
+WINDOW = 1
+
+# Hits scoring below this are dropped
+THRESHOLD = 2
+
+
+class AmbiguityFilter:
+    """Keeps or drops hits on common-word names from their surrounding captions.
+
+    A hit scores +1 per Rocket League word within WINDOW captions (up to
+    2), +2 when another roster name is within WINDOW captions, and +1 when
+    written with a capital (-1 without) where the captions around it are
+    cased and it isn't at a sentence start. Work is batched per
+    transcript and only done for transcripts with an ambiguous hit.
+    """
+
+    def __init__(self, names, vocabulary=RL_VOCABULARY, window=WINDOW, threshold=THRESHOLD):
+        self.names = {name.lower() for name in names}
+        self.vocabulary = vocabulary
+        self.window = window
+        self.threshold = threshold
+
+    def __bool__(self):
+        return bool(self.names)
+
+    def filter(self, texts, hits):
+        """Return hits (as yielded by NameMatcher.scan_segments) that survive."""
+        texts = list(texts)
+        flagged = [
+            k for k, hit in enumerate(hits) if _surface(texts, hit).lower() in self.names
+        ]
+        if not flagged:
+            return hits
+
+        flagged_set = set(flagged)
+        anchors = sorted({hits[k][0] for k in range(len(hits)) if k not in flagged_set})
+
+        # (vocabulary words, has capitals) for just the captions some window touches
+        context = {}
+        for k in flagged:
+            index = hits[k][0]
+            for i in range(max(0, index - self.window), min(len(texts), index + self.window + 1)):
+                if i not in context:
+                    context[i] = (self._words(texts[i]), texts[i].lower() != texts[i])
+
+        dropped = set()
+        for k in flagged:
+            index, start, end_index = hits[k][0], hits[k][1], hits[k][2]
+            window = []
+            for i in range(max(0, index - self.window), min(len(texts), index + self.window + 1)):
+                words, cased = context[i]
+                if words and index <= i <= end_index:
+                    # A name that is also a Rocket League word is not its own context
+                    words = self._words(_outside(texts, hits[k], i))
+                window.append((words, cased))
+            score = min(2, sum(words for words, _ in window))
+
+            # Auto-captions are all lowercase, so case only counts where there is some
+            if any(cased for _, cased in window) and not _sentence_start(texts[index], start):
+                score += 1 if _surface(texts, hits[k])[:1].isupper() else -1
+
+            nearest = bisect_left(anchors, index - self.window)
+            if nearest < len(anchors) and anchors[nearest] <= index + self.window:
+                score += 2
+
+            if score < self.threshold:
+                dropped.add(k)
+
+        return [hit for k, hit in enumerate(hits) if k not in dropped]
+
+    def _words(self, text):
+        """Count the distinct Rocket League words in text."""
+        return len(self.vocabulary.intersection(WORD_RE.findall(text.lower())))
+
+
+def _surface(texts, hit):
+    """Return the caption text a hit matched."""
+    index, start, end_index, end, _ = hit
+    if index == end_index:
+        return texts[index][start:end]
+    return texts[index][start:] + ' ' + texts[end_index][:end]
+
+
+def _outside(texts, hit, i):
+    """Return caption i with the text a hit matched cut out, so a name never counts as its own context."""
+    index, start, end_index, end, _ = hit
+    text = texts[i]
+    if i == end_index:
+        text = (text[:start] if i == index else '') + ' ' + text[end:]
+    elif i == index:
+        text = text[:start]
+    return text
+
+
+def _sentence_start(text, start):
+    """Whether a capital at text[start] could just be the start of a sentence."""
+    before = text[:start].rstrip()
+    return not before or before[-1] in '.!?'
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Frontend output writers.
+The sharded format is a small manifest plus one minified shard per player
+and per channel, so the web UI only downloads what a search needs. The
+legacy writer still produces the original single mentions.json.
+
+Videos are streamed: all_data['videos'] may be any iterable in date order
+(newest first), and only per-player counts are held in memory while
+writing. Every file is written to a temp name and renamed into place, and
+the manifest is written last.
+
+Run directly to convert an existing mentions.json into shards.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import METRICS
+from rollups import rollup_table
+from search_index import build_search_index
+
+FORMAT_VERSION = 2
+DATA_DIR = Path(__file__).parent.parent / 'frontend' / 'public' / 'data'
+LEGACY_NAME = 'mentions.json'
+MANIFEST_NAME = 'manifest.json'
+SEARCH_NAME = 'search.json'
+ROLLUPS_NAME = 'rollups.json'
+PLAYER_DIR = 'players'
+CHANNEL_DIR = 'channels'
+
+# Shard rows held in memory before they are spilled to disk
+SHARD_BUFFER_ROWS = 20000
+
+# Videos sorted in memory at a time by sorted_videos before spilling a run
+SORT_RUN_SIZE = 10000
+
+
+def compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Write to a temp file beside path and rename it over path on success."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    f = open(tmp, mode, encoding=None if 'b' in mode else 'utf-8')
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        tmp.unlink()
+        raise
+    f.close()
+    METRICS.count('bytes_written', tmp.stat().st_size)
+    os.replace(tmp, path)
+
+
+def dump_compact(obj, path):
+    """Write minified JSON and return the number of bytes written."""
+    data = compact(obj).encode('utf-8')
+    with atomic_write(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def video_key(video):
+    return video['date'], video['videoId']
+
+
+def sorted_videos(videos, run_size=SORT_RUN_SIZE):
+    """Read videos and return an iterator over them newest first.
+
+    The input is consumed straight away, but no more than run_size videos
+    are held at once: sorted runs are spilled to temp files as JSON lines
+    and merged as the result is iterated.
+    """
+    runs = []
+    batch = []
+    for video in videos:
+        batch.append(video)
+        if len(batch) >= run_size:
+            batch.sort(key=video_key, reverse=True)
+            run = tempfile.TemporaryFile('w+', encoding='utf-8')
+            run.writelines(compact(v) + '\n' for v in batch)
+            run.seek(0)
+            runs.append(run)
+            batch = []
+    batch.sort(key=video_key, reverse=True)
+    if not runs:
+        return iter(batch)
+    return _merge_runs(runs, batch)
+
+
+def _merge_runs(runs, batch):
+    try:
+        streams = [(json.loads(line) for line in run) for run in runs]
+        yield from heapq.merge(*streams, batch, key=video_key, reverse=True)
+    finally:
+        for run in runs:
+            run.close()
+
+
+class ShardIndex:
+    """Interns players and channels and counts rows as videos go past.
+
+    Players and channels are interned to their index in the manifest lists.
+    A player shard row is [videoId, channelId, date, title, thumbnail,
+    [[seconds, text], ...]]; a channel shard row is [videoId, date, title,
+    thumbnail, [[playerId, [[seconds, text], ...]], ...]].
+    """
+
+    def __init__(self, players, channels):
+        self.players = list(dict.fromkeys(players))
+        self.channels = list(dict.fromkeys(channels))
+        self.player_ids = {name: i for i, name in enumerate(self.players)}
+        self.channel_ids = {name: i for i, name in enumerate(self.channels)}
+        self.mention_counts = {}
+        self.video_counts = {}
+        self.channel_counts = {}
+        self.video_count = 0
+
+    def rows(self, video):
+        """Return ([(player_id, row), ...], (channel_id, row)) for a video."""
+        channel = video['channel']
+        if channel not in self.channel_ids:
+            self.channel_ids[channel] = len(self.channels)
+            self.channels.append(channel)
+        channel_id = self.channel_ids[channel]
+
+        player_rows = []
+        per_player = []
+        for player, mentions in video['mentions'].items():
+            if player not in self.player_ids:
+                # Names cached under an older roster still get exported
+                self.player_ids[player] = len(self.players)
+                self.players.append(player)
+            player_id = self.player_ids[player]
+            hits = [[m['seconds'], m['text']] for m in mentions]
+            per_player.append([player_id, hits])
+            player_rows.append((
+                player_id,
+                [video['videoId'], channel_id, video['date'], video['title'], video['thumbnail'], hits]
+            ))
+            self.mention_counts[player_id] = self.mention_counts.get(player_id, 0) + len(hits)
+            self.video_counts[player_id] = self.video_counts.get(player_id, 0) + 1
+
+        self.channel_counts[channel_id] = self.channel_counts.get(channel_id, 0) + 1
+        self.video_count += 1
+        channel_row = [video['videoId'], video['date'], video['title'], video['thumbnail'], per_player]
+        return player_rows, (channel_id, channel_row)
+
+    def manifest(self, all_data):
+        manifest = {
+            'version': FORMAT_VERSION,
+            'lastUpdated': all_data['lastUpdated'],
+            'videoCount': self.video_count,
+            'channels': self.channels,
+            'players': self.players,
+            'mentionCounts': [self.mention_counts.get(i, 0) for i in range(len(self.players))],
+            'videoCounts': [self.video_counts.get(i, 0) for i in range(len(self.players))],
+            'channelVideoCounts': [self.channel_counts.get(i, 0) for i in range(len(self.channels))],
+            'playerShards': f"{PLAYER_DIR}/{{id}}.json",
+            'channelShards': f"{CHANNEL_DIR}/{{id}}.json",
+            'searchIndex': SEARCH_NAME,
+        }
+        if 'stats' in all_data:
+            manifest['stats'] = all_data['stats']
+        return manifest
+
+
+def build_shards(all_data):
+    """Split all_data into a manifest and per-player/per-channel shards in memory.
+
+    Rows keep the order of all_data['videos'].
+    """
+    index = ShardIndex(all_data['players'], all_data['channels'])
+    player_shards = {}
+    channel_shards = {}
+    for video in all_data['videos']:
+        player_rows, (channel_id, channel_row) = index.rows(video)
+        for player_id, row in player_rows:
+            player_shards.setdefault(player_id, []).append(row)
+        channel_shards.setdefault(channel_id, []).append(channel_row)
+    return index.manifest(all_data), player_shards, channel_shards
+
+
+class ShardWriter:
+    """Streams rows into one JSON array file per shard in a directory.
+
+    Rows are buffered, spilled to a line file per shard, and joined into
+    arrays by finish(), which builds a fresh directory and swaps it in for
+    the old one.
+    """
+
+    def __init__(self, directory, buffer_rows=SHARD_BUFFER_ROWS):
+        self.directory = Path(directory)
+        self.staging = self.directory.with_name(self.directory.name + '.new')
+        shutil.rmtree(self.staging, ignore_errors=True)
+        self.parts = self.staging / '.parts'
+        self.parts.mkdir(parents=True)
+        self.buffer_rows = buffer_rows
+        self.buffers = {}
+        self.buffered = 0
+
+    def add(self, shard_id, row):
+        self.buffers.setdefault(shard_id, []).append(compact(row))
+        self.buffered += 1
+        if self.buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        for shard_id, rows in self.buffers.items():
+            with open(self.parts / f"{shard_id}.jsonl", 'a', encoding='utf-8') as f:
+                f.write('\n'.join(rows) + '\n')
+        self.buffers.clear()
+        self.buffered = 0
+
+    def finish(self):
+        """Write every shard, swap the directory in, and return bytes written."""
+        self.flush()
+        total = 0
+        for part in self.parts.iterdir():
+            shard = self.staging / f"{part.stem}.json"
+            with open(part, encoding='utf-8') as src, open(shard, 'w', encoding='utf-8') as dst:
+                separator = '['
+                for line in src:
+                    dst.write(separator + line.rstrip('\n'))
+                    separator = ','
+                dst.write(']')
+            total += shard.stat().st_size
+        shutil.rmtree(self.parts)
+        METRICS.count('bytes_written', total)
+
+        old = self.directory.with_name(self.directory.name + '.old')
+        shutil.rmtree(old, ignore_errors=True)
+        if self.directory.exists():
+            self.directory.rename(old)
+        self.staging.rename(self.directory)
+        shutil.rmtree(old, ignore_errors=True)
+        return total
+
+    def abort(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+def indented(obj, depth):
+    """json.dumps(obj, indent=2) as it appears nested depth levels deep."""
+    return json.dumps(obj, indent=2, ensure_ascii=False).replace('\n', '\n' + '  ' * depth)
+
+
+def legacy_chunks(all_data, videos):
+    """Yield the text of mentions.json, exactly as json.dump(indent=2) writes it.
+
+    videos is consumed lazily in place of all_data['videos'].
+    """
+    yield '{'
+    separator = '\n'
+    for key, value in all_data.items():
+        yield f"{separator}  {json.dumps(key, ensure_ascii=False)}: "
+        separator = ',\n'
+        if key != 'videos':
+            yield indented(value, 1)
+            continue
+        opener = '[\n    '
+        for video in videos:
+            yield opener + indented(video, 2)
+            opener = ',\n    '
+        yield '[]' if opener == '[\n    ' else '\n  ]'
+    yield '\n}' if separator != '\n' else '}'
+
+
+def write_output(all_data, legacy=False, data_dir=DATA_DIR, rollups=None):
+    """Stream videos into shards (and mentions.json if legacy) and return the manifest.
+
+    all_data['videos'] may be a generator; it is read once, in order.
+    rollups, as returned by VideoCache.rollups(), are written to
+    rollups.json and listed in the manifest.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    index = ShardIndex(all_data['players'], all_data['channels'])
+    writers = {PLAYER_DIR: ShardWriter(data_dir / PLAYER_DIR), CHANNEL_DIR: ShardWriter(data_dir / CHANNEL_DIR)}
+
+    def videos():
+        for video in all_data['videos']:
+            player_rows, (channel_id, channel_row) = index.rows(video)
+            for player_id, row in player_rows:
+                writers[PLAYER_DIR].add(player_id, row)
+            writers[CHANNEL_DIR].add(channel_id, channel_row)
+            yield video
+
+    try:
+        if legacy:
+            with atomic_write(data_dir / LEGACY_NAME) as f:
+                f.writelines(legacy_chunks(all_data, videos()))
+            print(f"Legacy output: {data_dir / LEGACY_NAME}")
+        else:
+            for _ in videos():
+                pass
+        total = sum(writer.finish() for writer in writers.values())
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    manifest = index.manifest(all_data)
+    search = build_search_index(manifest['players'], manifest['mentionCounts'], manifest['videoCounts'])
+    total += dump_compact(search, data_dir / SEARCH_NAME)
+    if rollups is not None:
+        table = rollup_table(rollups, manifest['players'], manifest['channels'])
+        total += dump_compact(table, data_dir / ROLLUPS_NAME)
+        manifest['rollups'] = ROLLUPS_NAME
+    total += dump_compact(manifest, data_dir / MANIFEST_NAME)
+
+    print(f"Wrote manifest, search index, {len(index.mention_counts)} player shards and "
+          f"{len(index.channel_counts)} channel shards ({total / 1024:.1f} KB)")
+    return manifest
+
+
+def write_sharded(all_data, data_dir=DATA_DIR):
+    """Write the manifest and shards only."""
+    return write_output(all_data, legacy=False, data_dir=data_dir)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    source = Path(argv[0]) if argv else DATA_DIR / LEGACY_NAME
+    with open(source, 'r', encoding='utf-8') as f:
+        all_data = json.load(f)
+    write_sharded(all_data, source.parent)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
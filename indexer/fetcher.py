@@ -0,0 +1,288 @@
+"""
+Concurrent transcript fetching.
+Runs transcript requests on a bounded thread pool with one client per
+worker, a shared token bucket, and a shared backoff gate so that an
+"IP blocked" response pauses every worker instead of skipping videos.
+
+A fetch that yields no transcript is classified (captions disabled, not
+available yet, rate limited, or another error) so the cache can schedule
+a retry suited to the cause.
+"""
+
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import METRICS
+
+TRANSCRIPT_WORKERS = 4
+TRANSCRIPT_RATE = 2.0  # requests per second across all workers
+TRANSCRIPT_BURST = 4
+MAX_RETRIES = 3
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 600.0
+
+# Why a fetch returned no transcript
+DISABLED = 'disabled'          # the uploader turned captions off
+UNAVAILABLE = 'unavailable'    # no English track (yet, for fresh uploads)
+RATE_LIMITED = 'rate_limited'  # still blocked after every retry
+ERROR = 'error'                # any other failure
+FAILURES = (DISABLED, UNAVAILABLE, RATE_LIMITED, ERROR)
+
+
+class NoTranscript(Exception):
+    """Raised by a provider when a video has no transcript for a known reason."""
+
+    def __init__(self, failure, message=''):
+        super().__init__(message or failure)
+        self.failure = failure
+
+
+def is_rate_limited(error):
+    """Check whether an exception is YouTube's IP block response."""
+    message = str(error)
+    return "IP" in message and "blocked" in message
+
+
+def pause(seconds, stop=None):
+    """Sleep for seconds, waking early once stop (a threading.Event) is set.
+
+    Returns False if it woke because of stop.
+    """
+    if stop is None:
+        time.sleep(seconds)
+        return True
+    return not stop.wait(seconds)
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetch workers (rate 0 = unlimited)."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop=None):
+        """Block until a token is available, then take it.
+
+        Returns False without a token if stop is set while waiting.
+        """
+        if not self.rate:
+            return True
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            METRICS.count('rate_limit_wait_seconds', wait)
+            if not pause(wait, stop):
+                return False
+
+
+class BackoffGate:
+    """Shared pause that every worker waits on after a rate-limit hit."""
+
+    def __init__(self, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+        self.base = base
+        self.maximum = maximum
+        self.strikes = 0
+        self.resume_at = 0.0
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def wait(self, stop=None):
+        """Sleep until the current backoff window (if any) has passed.
+
+        Returns False as soon as stop is set instead.
+        """
+        while True:
+            with self.lock:
+                remaining = self.resume_at - time.monotonic()
+            if remaining <= 0:
+                return True
+            if not pause(remaining, stop):
+                return False
+
+    def trip(self):
+        """Start (or keep) a backoff window; returns the pause length."""
+        with self.lock:
+            now = time.monotonic()
+            if now < self.resume_at:
+                # Another worker already tripped the gate for this block.
+                return self.resume_at - now
+            self.strikes += 1
+            self.trips += 1
+            delay = min(self.base * 2 ** (self.strikes - 1), self.maximum)
+            self.resume_at = now + delay
+        METRICS.count('backoff_trips')
+        METRICS.count('backoff_seconds', delay)
+        print(f"Rate limited - all workers backing off {delay:.0f}s")
+        return delay
+
+    def reset(self):
+        """Clear the strike count after a successful request."""
+        with self.lock:
+            self.strikes = 0
+
+
+class YouTubeTranscriptProvider:
+    """Fetches English transcripts through youtube_transcript_api."""
+
+    languages = ['en', 'en-US', 'en-GB']
+
+    def new_client(self):
+        from youtube_transcript_api import YouTubeTranscriptApi
+        return YouTubeTranscriptApi()
+
+    def fetch(self, client, video_id):
+        """Return the transcript, or None if there is no English one."""
+        from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
+        try:
+            transcript_list = client.list(video_id)
+            transcript = transcript_list.find_transcript(self.languages)
+            return transcript.fetch()
+        except TranscriptsDisabled:
+            raise NoTranscript(DISABLED)
+        except NoTranscriptFound:
+            return None
+
+
+Snippet = namedtuple('Snippet', ['text', 'start', 'duration'])
+
+
+class FakeTranscriptProvider:
+    """Offline provider that injects latency, missing transcripts and errors.
+
+    transcripts maps video IDs to lists of Snippet; unknown IDs get a short
+    generated transcript. Rates are probabilities per request.
+    """
+
+    BLOCKED_MESSAGE = "Your IP has been blocked by YouTube"
+
+    def __init__(self, transcripts=None, latency=0.05, jitter=0.0,
+                 missing_rate=0.0, error_rate=0.0, block_rate=0.0, seed=0):
+        self.transcripts = transcripts or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.missing_rate = missing_rate
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.clients = 0
+        self.calls = 0
+
+    def new_client(self):
+        with self.lock:
+            self.clients += 1
+            return object()
+
+    def fetch(self, client, video_id):
+        with self.lock:
+            self.calls += 1
+            roll = self.rng.random()
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        if roll < self.block_rate:
+            raise RuntimeError(self.BLOCKED_MESSAGE)
+        roll -= self.block_rate
+        if roll < self.error_rate:
+            raise RuntimeError(f"Injected error for {video_id}")
+        roll -= self.error_rate
+        if roll < self.missing_rate:
+            return None
+
+        if video_id in self.transcripts:
+            return self.transcripts[video_id]
+        return [Snippet(f"caption {i} for {video_id}", i * 5.0, 5.0) for i in range(20)]
+
+
+class TranscriptFetcher:
+    """Bounded worker pool that fetches transcripts concurrently."""
+
+    def __init__(self, provider=None, workers=TRANSCRIPT_WORKERS, rate=TRANSCRIPT_RATE,
+                 burst=TRANSCRIPT_BURST, max_retries=MAX_RETRIES, gate=None):
+        self.provider = provider or YouTubeTranscriptProvider()
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst)
+        self.gate = gate or BackoffGate()
+        self.max_retries = max_retries
+        self.local = threading.local()
+
+    def _client(self):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.provider.new_client()
+        return client
+
+    def fetch_result(self, video_id, stop=None):
+        """Fetch a single transcript, honouring the shared limits.
+
+        Returns (transcript, None), or (None, failure) with failure one of
+        FAILURES. Once stop (a threading.Event) is set, any wait on the rate
+        limit or a backoff ends and the fetch gives up as rate limited.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                METRICS.count('fetch_retries')
+            if not (self.gate.wait(stop) and self.bucket.acquire(stop)):
+                return None, RATE_LIMITED
+            try:
+                # Inside the try, so a provider that can't build a client
+                # fails this video rather than the whole run
+                client = self._client()
+                with METRICS.timer('fetch'):
+                    transcript = self.provider.fetch(client, video_id)
+                self.gate.reset()
+                METRICS.count('transcripts_fetched' if transcript else 'transcripts_missing')
+                return transcript, None if transcript else UNAVAILABLE
+            except NoTranscript as e:
+                self.gate.reset()
+                METRICS.count('transcripts_missing')
+                return None, e.failure
+            except Exception as e:
+                if not is_rate_limited(e):
+                    METRICS.count('fetch_errors')
+                    print(f"Error getting transcript: {e}")
+                    return None, ERROR
+                self.gate.trip()
+        METRICS.count('fetch_giveups')
+        print(f"Rate limited - giving up on {video_id}")
+        return None, RATE_LIMITED
+
+    def fetch_one(self, video_id):
+        """Fetch a single transcript, or None if there is none."""
+        return self.fetch_result(video_id)[0]
+
+    def fetch_all(self, video_ids, failures=False):
+        """Yield (video_id, transcript) pairs as each fetch completes.
+
+        With failures, yield (video_id, transcript, failure) instead.
+        """
+        video_ids = list(video_ids)
+        if not video_ids:
+            return
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {pool.submit(self.fetch_result, vid, stop): vid for vid in video_ids}
+            for future in as_completed(futures):
+                transcript, failure = future.result()
+                if failures:
+                    yield futures[future], transcript, failure
+                else:
+                    yield futures[future], transcript
+        finally:
+            # Wake workers sleeping out a backoff so shutdown doesn't wait for it
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
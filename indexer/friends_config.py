@@ -15,4 +15,7 @@ MY_FRIENDS = [
     # Add variations with/without numbers
 ]
 
-print(f"Configured to track {len(MY_FRIENDS)} friends")
\ No newline at end of file
+# Other names a friend goes by; mentions are counted under the friend
+# they belong to, e.g. {'GamerTag_2024': ['Tag', 'Taggy']}
+MY_FRIEND_ALIASES = {
+}
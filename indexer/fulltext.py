@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Phrase-level full-text index over stored transcripts.
+Every caption segment goes into a SQLite FTS5 index so arbitrary phrases
+("flip reset", unexpected names) can be searched with timestamps and a few
+seconds of surrounding captions. The index is kept in step with the raw
+transcript store one video at a time.
+
+Usage:
+    python fulltext.py build
+    python fulltext.py search "flip reset" [--limit 20]
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from matcher import format_timestamp
+
+FULLTEXT_PATH = Path(__file__).parent / 'cache' / 'fulltext.db'
+CONTEXT_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS segments_video ON segments (video_id, seq);
+CREATE INDEX IF NOT EXISTS segments_time ON segments (video_id, start);
+CREATE VIRTUAL TABLE IF NOT EXISTS captions USING fts5(
+    text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO captions (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO captions (captions, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TABLE IF NOT EXISTS indexed_videos (
+    video_id TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+"""
+
+
+def phrase_query(phrase):
+    """Quote user text as a single FTS5 phrase."""
+    return '"' + phrase.replace('"', '""') + '"'
+
+
+class FullTextIndex:
+    """FTS5 index of caption segments with time-window context lookups."""
+
+    def __init__(self, path=FULLTEXT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM segments').fetchone()[0]
+
+    def add_video(self, video_id, transcript, version='', commit=True):
+        """Index (or re-index) one video's segments."""
+        self.conn.execute('DELETE FROM segments WHERE video_id = ?', (video_id,))
+        self.conn.executemany(
+            'INSERT INTO segments (video_id, seq, start, text) VALUES (?, ?, ?, ?)',
+            ((video_id, seq, entry.start, entry.text) for seq, entry in enumerate(transcript))
+        )
+        self.conn.execute('INSERT OR REPLACE INTO indexed_videos VALUES (?, ?)', (video_id, version))
+        if commit:
+            self.conn.commit()
+
+    def sync(self, store):
+        """Index every stored transcript that is new or changed since last sync."""
+        indexed = dict(self.conn.execute('SELECT video_id, version FROM indexed_videos'))
+        pending = [
+            video_id for video_id, version in store.versions().items()
+            if indexed.get(video_id) != version
+        ]
+        if not pending:
+            return 0
+
+        start = time.perf_counter()
+        versions = store.versions()
+        for count, video_id in enumerate(pending, 1):
+            self.add_video(video_id, store.get(video_id), versions[video_id], commit=False)
+            if count % 100 == 0:
+                self.conn.commit()
+        self.conn.commit()
+        print(f"Full-text index: added {len(pending)} videos in {time.perf_counter() - start:.1f}s")
+        return len(pending)
+
+    def context(self, video_id, seconds, window=CONTEXT_SECONDS):
+        """Return (start, text) for segments within window seconds of a time."""
+        return self.conn.execute(
+            'SELECT start, text FROM segments WHERE video_id = ? AND start BETWEEN ? AND ? '
+            'ORDER BY start',
+            (video_id, seconds - window, seconds + window)
+        ).fetchall()
+
+    def search(self, phrase, limit=20, offset=0, window=CONTEXT_SECONDS, ranked=False):
+        """Find segments containing phrase, with surrounding caption context.
+
+        Results come in index order unless ranked, which sorts by bm25 at
+        the cost of scoring every match.
+        """
+        order = 'ORDER BY rank' if ranked else ''
+        rows = self.conn.execute(
+            f'SELECT s.video_id, s.start, s.text FROM captions '
+            f'JOIN segments s ON s.id = captions.rowid '
+            f'WHERE captions MATCH ? {order} LIMIT ? OFFSET ?',
+            (phrase_query(phrase), limit, offset)
+        ).fetchall()
+
+        hits = []
+        for video_id, start, text in rows:
+            hits.append({
+                'videoId': video_id,
+                'seconds': int(start),
+                'time': format_timestamp(start),
+                'text': text,
+                'context': [
+                    {'seconds': int(s), 'text': t}
+                    for s, t in (self.context(video_id, start, window) if window else [])
+                ]
+            })
+        return hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Full-text phrase search over stored transcripts')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help='index stored transcripts that are new or changed')
+    search_parser = sub.add_parser('search', help='search for a phrase')
+    search_parser.add_argument('phrase')
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.add_argument('--context', type=float, default=CONTEXT_SECONDS,
+                               help='seconds of surrounding captions to show')
+    args = parser.parse_args(argv)
+
+    index = FullTextIndex()
+    if args.command == 'build':
+        from transcripts import TranscriptStore
+        store = TranscriptStore()
+        index.sync(store)
+        store.close()
+        print(f"{len(index)} segments indexed")
+    else:
+        start = time.perf_counter()
+        hits = index.search(args.phrase, limit=args.limit, window=args.context)
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"https://youtube.com/watch?v={hit['videoId']}&t={hit['seconds']}  [{hit['time']}] {hit['text']}")
+            for line in hit['context']:
+                print(f"    {format_timestamp(line['seconds'])}  {line['text']}")
+        print(f"{len(hits)} hits in {elapsed:.1f} ms")
+    index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Fuzzy matching for names that auto-captions spell by ear.
+Captions write gamertags the way they sound ("vateera" for Vatira, "kay
+dop" for Kaydop), so exact matching misses them. Candidates come from two
+precomputed indexes over the roster, so lookups don't depend on how many
+names are tracked:
+
+- a phonetic key (consonant skeleton) per name
+- a SymSpell-style index of every name with up to MAX_EDITS letters deleted
+
+Each candidate is then scored and kept above MIN_CONFIDENCE.
+"""
+
+import re
+
+from matcher import WORD_RE
+
+MAX_EDITS = 2
+MIN_WORD = 5
+# Shortest word that may be half of a split name ("just in" is not jstn)
+MIN_PART = 3
+MIN_CONFIDENCE = 0.8
+
+# Spellings that sound alike, applied in order before building a key
+PHONETIC_RULES = (
+    ('ph', 'f'), ('ck', 'k'), ('qu', 'kw'), ('q', 'k'), ('x', 'ks'), ('c', 'k'),
+    ('z', 's'), ('dg', 'j'), ('gh', 'g'), ('kn', 'n'), ('wr', 'r'),
+)
+
+_DIGITS = re.compile(r'\d')
+
+
+def phonetic_key(word):
+    """Return the first letter plus the following consonants, repeats collapsed."""
+    word = word.lower()
+    for old, new in PHONETIC_RULES:
+        word = word.replace(old, new)
+    key = word[:1]
+    for ch in word[1:]:
+        if ch in 'aeiouyhw' or ch == key[-1]:
+            continue
+        key += ch
+    return key
+
+
+def max_edits(length):
+    """Edits allowed for a word of this length."""
+    if length < 5:
+        return 0
+    return 1 if length < 8 else MAX_EDITS
+
+
+def deletes(word, edits):
+    """Return word with every combination of up to edits letters removed."""
+    found = {word}
+    frontier = {word}
+    for _ in range(edits):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 once it is certain to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """Looks up caption words (and adjacent word pairs) that sound like a name.
+
+    Built from a NameMatcher's surfaces; names in exclude (e.g. ones that are
+    everyday words) and names shorter than MIN_WORD are left out.
+    """
+
+    def __init__(self, matcher, exclude=(), min_confidence=MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        exclude = {name.lower() for name in exclude}
+        self.targets = {}
+        self.phonetic = {}
+        self.deleted = {}
+        for surface, name in matcher.surfaces.items():
+            target = ''.join(WORD_RE.findall(surface.lower()))
+            if surface.lower() in exclude or len(target) < MIN_WORD or _DIGITS.search(target):
+                continue
+            self.targets[target] = name
+            self.phonetic.setdefault(phonetic_key(target), set()).add(target)
+            for variant in deletes(target, max_edits(len(target))):
+                self.deleted.setdefault(variant, set()).add(target)
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.targets)
+
+    def lookup(self, word):
+        """Return (name, confidence) for the best match to a word, or None."""
+        if word in self.cache:
+            return self.cache[word]
+        best = None
+        if len(word) >= MIN_WORD:
+            key = phonetic_key(word)
+            candidates = set(self.phonetic.get(key, ()))
+            for variant in deletes(word, max_edits(len(word))):
+                candidates |= self.deleted.get(variant, set())
+            for target in candidates:
+                confidence = self.confidence(word, target, key)
+                if confidence >= self.min_confidence and (best is None or confidence > best[1]):
+                    best = (self.targets[target], confidence)
+        if len(self.cache) < 100000:
+            self.cache[word] = best
+        return best
+
+    def confidence(self, word, target, key=None):
+        """Edit similarity, pulled halfway to 1 when the words also sound alike."""
+        longest = max(len(word), len(target))
+        distance = edit_distance(word, target, longest)
+        similarity = 1 - distance / longest
+        if (key or phonetic_key(word)) == phonetic_key(target):
+            return (1 + similarity) / 2
+        return similarity
+
+    def scan(self, text, covered=()):
+        """Return (start, end, name, confidence) for fuzzy hits in text.
+
+        Words inside covered (start, end) spans, i.e. exact hits, are skipped.
+        """
+        tokens = [
+            (m.group().lower(), m.start(), m.end()) for m in WORD_RE.finditer(text)
+            if not any(start <= m.start() < end for start, end in covered)
+        ]
+        hits = []
+        i = 0
+        while i < len(tokens):
+            word, start, end = tokens[i]
+            found = None
+            if (i + 1 < len(tokens) and min(len(word), len(tokens[i + 1][0])) >= MIN_PART
+                    and text[end:tokens[i + 1][1]].isspace()):
+                # "kay dop": a name split into sounds
+                pair = self.lookup(word + tokens[i + 1][0])
+                if pair:
+                    found = (start, tokens[i + 1][2], *pair)
+            single = self.lookup(word)
+            if single and (not found or single[1] >= found[3]):
+                found = (start, end, *single)
+            if found:
+                hits.append(found)
+                i += 2 if found[1] > end else 1
+            else:
+                i += 1
+        return hits
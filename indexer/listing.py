@@ -0,0 +1,195 @@
+"""
+Channel listing through the uploads playlist, plus batched video metadata.
+playlistItems().list costs 1 quota unit per page versus 100 for
+search().list, and returns uploads newest first, so incremental runs can
+stop as soon as they reach a video that is already cached. Every list call
+is counted in METRICS as quota_units.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from metrics import METRICS
+
+PAGE_SIZE = 50
+PLAYLIST_FIELDS = (
+    'nextPageToken,'
+    'items(snippet(title,publishedAt,thumbnails/medium/url,resourceId/videoId),'
+    'contentDetails/videoPublishedAt)'
+)
+
+
+class ListingError(Exception):
+    """Raised when a listing stops early on an API error.
+
+    videos holds the uploads listed before the error. They stop short of
+    the cursor or cutoff the listing was heading for, so callers must not
+    treat them as everything new.
+    """
+
+    def __init__(self, message, videos):
+        super().__init__(message)
+        self.videos = videos
+
+
+def get_uploads_playlist(youtube, channel_id):
+    """Return the uploads playlist ID for a channel."""
+    # Channel IDs map directly onto their uploads playlist: UCxxxx -> UUxxxx
+    if channel_id.startswith('UC'):
+        return 'UU' + channel_id[2:]
+
+    METRICS.count('quota_units')
+    response = youtube.channels().list(
+        part='contentDetails',
+        id=channel_id,
+        fields='items/contentDetails/relatedPlaylists/uploads'
+    ).execute()
+    items = response.get('items', [])
+    if not items:
+        raise ValueError(f"Channel not found: {channel_id}")
+    return items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+
+def parse_playlist_item(item):
+    """Convert a playlistItems resource into a video dict, or None if unavailable."""
+    snippet = item.get('snippet', {})
+    thumbnail = snippet.get('thumbnails', {}).get('medium')
+    published = item.get('contentDetails', {}).get('videoPublishedAt')
+    # Private and deleted uploads have no thumbnails or publish date
+    if not thumbnail or not published:
+        return None
+    return {
+        'id': snippet['resourceId']['videoId'],
+        'title': snippet['title'],
+        'date': published[:10],
+        'thumbnail': thumbnail['url']
+    }
+
+
+def get_channel_videos(youtube, channel_id, max_results=500, days_back=None, stop_at=None):
+    """Fetch a channel's uploads, newest first.
+
+    Listing stops after max_results videos, at the first video older than
+    days_back, or at the first video ID for which stop_at(video_id) is true.
+    Raises ListingError if an API error ends it before then.
+    """
+    videos = []
+    next_page = None
+
+    cutoff = None
+    if days_back:
+        cutoff = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+
+    print(f"Listing uploads for channel: {channel_id}")
+
+    try:
+        playlist_id = get_uploads_playlist(youtube, channel_id)
+    except Exception as e:
+        METRICS.count('api_errors')
+        raise ListingError(f"Error finding uploads playlist: {e}", videos) from e
+
+    while len(videos) < max_results:
+        METRICS.count('quota_units')
+        try:
+            response = youtube.playlistItems().list(
+                part='snippet,contentDetails',
+                playlistId=playlist_id,
+                maxResults=PAGE_SIZE,
+                pageToken=next_page,
+                fields=PLAYLIST_FIELDS
+            ).execute()
+        except Exception as e:
+            METRICS.count('api_errors')
+            raise ListingError(f"Error listing uploads: {e}", videos) from e
+
+        for item in response.get('items', []):
+            video = parse_playlist_item(item)
+            if not video:
+                continue
+            if stop_at and stop_at(video['id']):
+                return videos
+            if cutoff and video['date'] < cutoff:
+                return videos
+            videos.append(video)
+            if len(videos) >= max_results:
+                return videos
+
+        next_page = response.get('nextPageToken')
+        if not next_page:
+            break
+
+        print(f"Fetched {len(videos)} videos...")
+
+    return videos
+
+
+VIDEO_BATCH_SIZE = 50
+VIDEO_FIELDS = 'items(id,snippet(title,publishedAt,thumbnails/medium/url),contentDetails/duration)'
+DURATION_RE = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def parse_duration(value):
+    """Convert an ISO 8601 duration like PT1H2M3S into seconds."""
+    match = DURATION_RE.fullmatch(value or '')
+    if not match:
+        return None
+    days, hours, mins, secs = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + mins) * 60 + secs
+
+
+def get_video_details(youtube, video_ids):
+    """Look up current metadata for video IDs, 50 per videos().list call.
+
+    Returns {video_id: {'title', 'date', 'thumbnail', 'duration'}}; IDs that
+    are missing from the result were deleted or made private.
+    """
+    video_ids = list(video_ids)
+    details = {}
+
+    for start in range(0, len(video_ids), VIDEO_BATCH_SIZE):
+        batch = video_ids[start:start + VIDEO_BATCH_SIZE]
+        METRICS.count('quota_units')
+        try:
+            response = youtube.videos().list(
+                part='snippet,contentDetails',
+                id=','.join(batch),
+                maxResults=VIDEO_BATCH_SIZE,
+                fields=VIDEO_FIELDS
+            ).execute()
+        except Exception as e:
+            METRICS.count('api_errors')
+            print(f"Error fetching video details: {e}")
+            continue
+
+        for item in response.get('items', []):
+            snippet = item['snippet']
+            details[item['id']] = {
+                'title': snippet['title'],
+                'date': snippet['publishedAt'][:10],
+                'thumbnail': snippet.get('thumbnails', {}).get('medium', {}).get('url'),
+                'duration': parse_duration(item.get('contentDetails', {}).get('duration'))
+            }
+
+    return details
+
+
+class YouTubeListing:
+    """Listing provider backed by the YouTube Data API.
+
+    Providers build one client per thread with new_client() and pass it back
+    to list_videos and video_details; replay.ReplayListing is the offline
+    stand-in.
+    """
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    def new_client(self):
+        from googleapiclient.discovery import build
+        return build('youtube', 'v3', developerKey=self.api_key)
+
+    def list_videos(self, client, channel_id, **options):
+        return get_channel_videos(client, channel_id, **options)
+
+    def video_details(self, client, video_ids):
+        return get_video_details(client, video_ids)
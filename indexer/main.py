@@ -2,254 +2,612 @@
 """
 YouTube Channel Indexer with Caching
 Processes YouTube channels to find player mentions in video transcripts.
+Usually run through run.py; main(argv) is the in-process entry point for
+the index and rematch commands.
 """
 
 import os
-import json
-import re
+import sys
 import hashlib
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 from datetime import datetime, timedelta
-from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
-from players import ALL_PLAYERS, PRO_PLAYERS, FRIENDS
+from cache import VideoCache
+from disambiguate import AmbiguityFilter
+from export import MANIFEST_NAME, write_output
+from fetcher import UNAVAILABLE, TranscriptFetcher
+from fulltext import FullTextIndex
+from fuzzy import FuzzyMatcher
+from listing import ListingError, YouTubeListing
+from metrics import METRICS
+from matcher import (
+    find_mentions, get_matcher, alias_map, roster_entries, parse_roster_entries,
+    roster_fingerprint, roster_fuzzy, WORD_RE
+)
+from pipeline import MISS, IndexPipeline
+from players import ALL_PLAYERS, ALIASES, AMBIGUOUS_NAMES, PRO_PLAYERS, FRIENDS, FRIENDS_CONFIGURED
+from transcripts import TranscriptStore, decode_segments, parse_segments
 
 # Configuration
 API_KEY = os.environ.get('YOUTUBE_API_KEY')
-OUTPUT_PATH = Path(__file__).parent.parent / 'frontend' / 'public' / 'data' / 'mentions.json'
-CACHE_PATH = Path(__file__).parent / 'cache' / 'video_cache.json'
+LISTING = YouTubeListing(API_KEY)
+OUTPUT_DIR = Path(__file__).parent.parent / 'frontend' / 'public' / 'data'
+
+# JSON metrics for the latest run (stage timings, quota, retries, bytes)
+REPORT_PATH = Path(__file__).parent / 'cache' / 'run_report.json'
+
+# How far back the first run for a channel lists (--backfill-days, 0 for
+# the newest 500 uploads whatever their age); later runs use cursors
+BACKFILL_DAYS = 30
+
+# Cached videos get their title/duration re-checked this often
+METADATA_REFRESH_DAYS = 7
+
+# Also look for names spelled by ear in auto-captions ("vateera" for
+# Vatira); --fuzzy / --no-fuzzy override this for a run
+FUZZY_MATCHING = False
+FUZZY = FuzzyMatcher(get_matcher(ALL_PLAYERS, ALIASES), AMBIGUOUS_NAMES) if FUZZY_MATCHING else None
+
+# Every matchable name mapped to its player, and a fingerprint of that map
+# (and of the fuzzy setting) identifying the roster that produced each
+# cache entry's mentions
+NAMES = alias_map(ALL_PLAYERS, ALIASES)
+ROSTER_ENTRIES = roster_entries(NAMES, AMBIGUOUS_NAMES, FUZZY.min_confidence if FUZZY else None)
+ROSTER = roster_fingerprint(ROSTER_ENTRIES)
+
+# Context check for hits on names that are also everyday words
+AMBIGUITY = AmbiguityFilter(AMBIGUOUS_NAMES)
+
+# Up to this many added names, stored transcripts are substring-checked
+# before being parsed and scanned
+PREFILTER_MAX_NAMES = 20
+
+# Record run progress every this many processed videos
+CHECKPOINT_EVERY = 25
+
+# Videos without a transcript re-fetched per run (--retry-budget); the
+# schedule and priorities are in retry.py
+RETRY_BUDGET = 25
+
+# Processes used by --rematch (--workers), and videos sent to one at a time
+REMATCH_WORKERS = 1
+REMATCH_CHUNK = 16
 
 CHANNELS = {
     'Retals': 'UCRLM6B6rGXDSJawUH_mHHPw',
 }
 
-def load_cache():
-    """Load video processing cache."""
-    try:
-        if CACHE_PATH.exists():
-            with open(CACHE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Cache load error: {e}")
-    
-    return {
-        'processed_videos': {},
-        'last_check': {},
-        'stats': {'total_processed': 0, 'cache_hits': 0, 'new_videos': 0}
-    }
-
-def save_cache(cache_data):
-    """Save video processing cache."""
-    try:
-        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(CACHE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Cache save error: {e}")
-
 def get_video_hash(video):
     """Generate hash for video to detect changes."""
     content = f"{video['title']}-{video['date']}"
     return hashlib.md5(content.encode()).hexdigest()
 
-def get_channel_videos(youtube, channel_id, max_results=500, days_back=30):
-    """Fetch videos from channel."""
-    videos = []
-    next_page = None
-    
-    date_filter = None
-    if days_back:
-        date_filter = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%dT00:00:00Z')
-    
-    print(f"Searching for videos in channel: {channel_id}")
-    if date_filter:
-        print(f"Looking for videos after: {date_filter[:10]}")
-    
-    while len(videos) < max_results:
-        try:
-            request_params = {
-                'part': 'snippet',
-                'channelId': channel_id,
-                'maxResults': min(50, max_results - len(videos)),
-                'order': 'date',
-                'type': 'video',
-                'pageToken': next_page
-            }
-            
-            if date_filter:
-                request_params['publishedAfter'] = date_filter
-            
-            request = youtube.search().list(**request_params)
-            response = request.execute()
-            
-            print(f"Found {len(response.get('items', []))} videos in response")
-            
-            if 'items' not in response:
-                print(f"Warning: No items in response. Keys: {list(response.keys())}")
-                break
-                
-            for item in response['items']:
-                videos.append({
-                    'id': item['id']['videoId'],
-                    'title': item['snippet']['title'],
-                    'date': item['snippet']['publishedAt'][:10],
-                    'thumbnail': item['snippet']['thumbnails']['medium']['url']
-                })
-            
-            next_page = response.get('nextPageToken')
-            if not next_page:
-                break
-            
-            print(f"Fetched {len(videos)} videos...")
-        except Exception as e:
-            print(f"Error in search: {e}")
-            break
-    
-    return videos
-
-def get_transcript(video_id):
-    """Get transcript with timestamps for a video."""
+def list_new_videos(listing, youtube, channel_id, cache, backfill_days=BACKFILL_DAYS):
+    """List uploads newer than the channel's cursor in the cache.
+    
+    Without a cursor, uploads from the last backfill_days days are listed.
+    A listing cut short by an API error is dropped and the cursor left
+    alone, so the next run lists the same range again.
+    """
+    cursor = cache.get_cursor(channel_id)
+    
     try:
-        api = YouTubeTranscriptApi()
-        transcript_list = api.list(video_id)
-        transcript = transcript_list.find_transcript(['en', 'en-US', 'en-GB'])
-        return transcript.fetch()
-    except (TranscriptsDisabled, NoTranscriptFound):
-        return None
-    except Exception as e:
-        if "IP" in str(e) and "blocked" in str(e):
-            print("Rate limited - skipping video")
+        if cursor:
+            # Incremental run: stop at the first upload we've already seen
+            videos = listing.list_videos(
+                youtube, channel_id,
+                stop_at=lambda video_id: video_id == cursor or video_id in cache
+            )
         else:
-            print(f"Error getting transcript: {e}")
+            videos = listing.list_videos(youtube, channel_id, days_back=backfill_days)
+    except ListingError as e:
+        # Indexing the part that was listed would cache it, and the next
+        # run would stop there instead of reaching the uploads after it
+        print(f"{e} - listing {channel_id} again next run")
+        videos = []
+    
+    # Queue before moving the cursor so an interrupted run can't lose them
+    cache.add_pending(channel_id, videos)
+    if videos:
+        cache.set_cursor(channel_id, videos[0]['id'])
+    
+    # Videos left over from an earlier interrupted run
+    listed = {video['id'] for video in videos}
+    leftover = [video for video in cache.pending_videos(channel_id) if video['id'] not in listed]
+    if leftover:
+        print(f"Resuming {len(leftover)} pending videos for {channel_id}")
+    return videos + leftover
+
+def indexed_video(video, name, mentions):
+    """Build the output entry for a video with mentions."""
+    return {
+        'videoId': video['id'],
+        'title': video['title'],
+        'date': video['date'],
+        'thumbnail': video['thumbnail'],
+        'channel': name,
+        'mentions': mentions
+    }
+
+def video_metadata(video, name):
+    """Listing fields kept in the cache so unlisted videos can be exported."""
+    return {
+        'title': video['title'],
+        'date': video['date'],
+        'thumbnail': video['thumbnail'],
+        'channel': name
+    }
+
+def cached_videos(cache, channels):
+    """Yield output entries for cached videos with mentions, newest first."""
+    for video_id, entry in cache.entries(channels, with_mentions=True, newest_first=True):
+        yield indexed_video({'id': video_id, **entry}, entry['channel'], entry['mentions'])
+
+def lookup_cached(cache, store, video, name):
+    """Return the cached result for a video, or MISS if it needs fetching.
+    
+    Entries matched against an older roster are only hits once sync_roster
+    has caught them up, which needs a stored transcript; the rest (such as
+    everything migrated from video_cache.json) are matched again.
+    """
+    entry = cache.get(video['id'])
+    if not entry or entry['hash'] != get_video_hash(video) or entry['roster'] != ROSTER:
+        # A stored transcript can be re-matched without touching the network
+        transcript = store.get(video['id'])
+        if transcript is None:
+            return MISS
+        return process_video(cache, store, video, name, transcript, fetched=False)
+    
+    cache.bump('cache_hits')
+    cache.remove_pending(video['id'])
+    metadata = video_metadata(video, name)
+    if any(entry[key] != value for key, value in metadata.items()):
+        cache.update(video['id'], **metadata)
+    if not entry['mentions']:
         return None
+    return indexed_video(video, name, entry['mentions'])
 
-def find_mentions(transcript, players):
-    """Find all player mentions in a transcript."""
+def process_video(cache, store, video, name, transcript, fetched=True, failure=None):
+    """Match a transcript and record the result in the cache.
+    
+    A fetch without a transcript is recorded as a failure (UNAVAILABLE
+    unless failure says otherwise) and scheduled for a retry.
+    """
+    if transcript and fetched:
+        store.put(video['id'], transcript)
     mentions = {}
+    if transcript:
+        with METRICS.timer('match'):
+            mentions = find_mentions(transcript, ALL_PLAYERS, ALIASES, AMBIGUITY, FUZZY)
+        METRICS.count('mentions_found', sum(len(m) for m in mentions.values()))
     
-    patterns = {p: re.compile(rf'\\b{re.escape(p)}\\b', re.IGNORECASE) for p in players}
+    with cache.batch():
+        cache.bump('new_videos')
+        cache.put(video['id'], {
+            'hash': get_video_hash(video),
+            'mentions': mentions,
+            'processed_date': datetime.utcnow().isoformat(),
+            'roster': ROSTER,
+            'duration': video.get('duration'),
+            'metadata_date': video.get('metadata_date'),
+            **video_metadata(video, name)
+        })
+        cache.remove_pending(video['id'])
+        if transcript:
+            cache.clear_failure(video['id'])
+        else:
+            cache.record_failure(video['id'], failure or UNAVAILABLE)
     
-    for entry in transcript:
-        text = entry.text
-        for player, pattern in patterns.items():
-            if pattern.search(text):
-                if player not in mentions:
-                    mentions[player] = []
-                
-                secs = int(entry.start)
-                mins, secs = divmod(secs, 60)
-                hours, mins = divmod(mins, 60)
-                
-                if hours > 0:
-                    timestamp = f"{hours}:{mins:02d}:{secs:02d}"
-                else:
-                    timestamp = f"{mins}:{secs:02d}"
-                
-                mentions[player].append({
-                    'time': timestamp,
-                    'seconds': int(entry.start),
-                    'text': text
-                })
+    if not mentions:
+        return None
+    return indexed_video(video, name, mentions)
+
+def backfill_failures(cache, store):
+    """Schedule retries for videos cached without a transcript before failures were recorded.
     
-    return mentions
+    Their schedule starts from when they were processed. Runs after the
+    pipeline every time, since entries migrated from video_cache.json
+    only get a channel, and so become retryable, once they are listed.
+    """
+    misses = [(video_id, when) for video_id, when in cache.untracked_misses() if video_id not in store]
+    if not misses:
+        return
+    with cache.batch():
+        for video_id, when in misses:
+            processed = datetime.fromisoformat(when) if when else datetime.utcnow()
+            cache.record_failure(video_id, UNAVAILABLE, processed)
+    print(f"Scheduled retries for {len(misses)} cached videos without transcripts")
 
-def index_channel_with_cache(youtube, name, channel_id, cache):
-    """Index channel videos using cache."""
-    print(f"\\nIndexing channel: {name}")
+def retry_failures(cache, store, fetcher, channels, budget=RETRY_BUDGET):
+    """Re-fetch up to budget videos whose retry is due, likeliest to succeed first."""
+    due = cache.due_retries(budget, channels=channels)
+    if not due:
+        return 0
+    print(f"Retrying {len(due)} videos without transcripts")
+    videos = {video['id']: video for video in due}
+    recovered = 0
+    for video_id, transcript, failure in fetcher.fetch_all(videos, failures=True):
+        video = videos[video_id]
+        METRICS.count('retries')
+        process_video(cache, store, video, video['channel'], transcript, failure=failure)
+        if transcript:
+            recovered += 1
+            METRICS.count('retries_recovered')
+    print(f"Recovered {recovered} of {len(due)} transcripts")
+    return recovered
+
+def refresh_metadata(listing, cache, channels):
+    """Refresh title, date and duration for stale cached videos in batches."""
+    cutoff = (datetime.utcnow() - timedelta(days=METADATA_REFRESH_DAYS)).isoformat()
+    stale = cache.video_ids(
+        channels, 'metadata_date IS NULL OR metadata_date < ?', (cutoff,)
+    )
+    if not stale:
+        return
     
-    videos = get_channel_videos(youtube, channel_id)
-    print(f"Found {len(videos)} videos")
+    print(f"Refreshing metadata for {len(stale)} cached videos")
+    details = listing.video_details(listing.new_client(), stale)
+    renamed = 0
+    now = datetime.utcnow().isoformat()
     
-    indexed = []
-    new_count = 0
-    cache_hits = 0
+    with cache.batch():
+        for video_id, fresh in details.items():
+            entry = cache.get(video_id)
+            if fresh['title'] != entry['title'] or fresh['date'] != entry['date']:
+                renamed += 1
+            entry.update({key: value for key, value in fresh.items() if value is not None})
+            # Keep the hash in step with the current metadata so renamed videos
+            # aren't mistaken for changed ones and refetched on the next listing
+            cache.update(
+                video_id,
+                title=entry['title'],
+                date=entry['date'],
+                thumbnail=entry['thumbnail'],
+                duration=entry['duration'],
+                hash=get_video_hash(entry),
+                metadata_date=now
+            )
+        # Deleted or private videos aren't returned; stamp them anyway so they
+        # are asked about again after METADATA_REFRESH_DAYS, not on every run
+        missing = [video_id for video_id in stale if video_id not in details]
+        for video_id in missing:
+            cache.update(video_id, metadata_date=now)
     
-    for i, video in enumerate(videos):
-        print(f"[{i+1}/{len(videos)}] {video['title'][:50]}...")
-        
-        video_hash = get_video_hash(video)
-        video_id = video['id']
-        
-        # Check cache
-        if (video_id in cache['processed_videos'] and 
-            cache['processed_videos'][video_id]['hash'] == video_hash):
-            
-            cached_mentions = cache['processed_videos'][video_id]['mentions']
-            if cached_mentions:
-                cache_hits += 1
-                total = sum(len(m) for m in cached_mentions.values())
-                print(f"    Cached: {total} mentions of {len(cached_mentions)} players")
-                indexed.append({
-                    'videoId': video['id'],
-                    'title': video['title'],
-                    'date': video['date'],
-                    'thumbnail': video['thumbnail'],
-                    'channel': name,
-                    'mentions': cached_mentions
-                })
-            else:
-                print("    Cached: No mentions")
+    print(f"Refreshed {len(details)} videos ({renamed} renamed, {len(missing)} no longer available)")
+
+def merge_mentions(mentions, extra):
+    """Merge newly matched players into existing mentions in full-scan order."""
+    order = {player: i for i, player in enumerate(ALL_PLAYERS)}
+    merged = {**mentions, **extra}
+    return dict(sorted(
+        merged.items(),
+        key=lambda item: (item[1][0]['seconds'], order.get(item[0], len(order)))
+    ))
+
+def prefilter_segments(segments, needles, depth):
+    """Keep segments containing a needle, plus the lines a name could run on into."""
+    keep = []
+    reach = -1
+    for i, seg in enumerate(segments):
+        if any(needle in seg.text.lower() for needle in needles):
+            reach = i + depth - 1
+        if i <= reach:
+            keep.append(seg)
+    return keep
+
+def canonical_mentions(mentions):
+    """Re-key cached mentions by player, folding in names that became aliases.
+
+    Names that are no longer tracked are dropped.
+    """
+    merged = {}
+    for name, hits in mentions.items():
+        player = NAMES.get(name)
+        if player is None:
             continue
-        
-        # Process new video
-        new_count += 1
-        transcript = get_transcript(video['id'])
-        if not transcript:
-            print("    No transcript available")
-            cache['processed_videos'][video_id] = {
-                'hash': video_hash,
-                'mentions': {},
-                'processed_date': datetime.utcnow().isoformat()
+        if player in merged:
+            seen = {hit['seconds'] for hit in merged[player]}
+            merged[player] = sorted(
+                merged[player] + [hit for hit in hits if hit['seconds'] not in seen],
+                key=lambda hit: hit['seconds']
+            )
+        else:
+            merged[player] = hits
+    return merge_mentions(merged, {}) if len(merged) < len(mentions) else merged
+
+def use_fuzzy(enabled):
+    """Switch fuzzy matching on or off for this process, updating the roster fingerprint."""
+    global FUZZY, ROSTER_ENTRIES, ROSTER
+    FUZZY = FuzzyMatcher(get_matcher(ALL_PLAYERS, ALIASES), AMBIGUOUS_NAMES) if enabled else None
+    ROSTER_ENTRIES = roster_entries(NAMES, AMBIGUOUS_NAMES, FUZZY.min_confidence if FUZZY else None)
+    ROSTER = roster_fingerprint(ROSTER_ENTRIES)
+
+def changed_players(old):
+    """Return the players whose matchable names differ from an old roster."""
+    current = parse_roster_entries(ROSTER_ENTRIES)
+    changed = {entry[0] for name, entry in current.items() if old.get(name) != entry}
+    changed.update(
+        entry[0] for name, entry in old.items()
+        if entry[0] in NAMES and current.get(name) != entry
+    )
+    return changed
+
+def sync_roster(cache, store):
+    """Bring cached mentions up to date with the current player list.
+    
+    Stored transcripts are first scanned for just the players whose names
+    or aliases changed since an entry was matched. A changed name can shift
+    the longest-match and context decisions for other players, so entries
+    where one hits, or that had mentions of a changed player, are re-matched
+    in full; the rest keep their mentions as they are.
+    """
+    cache.put_roster(ROSTER, ROSTER_ENTRIES)
+    groups = cache.roster_groups(ROSTER)
+    if not groups:
+        return
+    
+    start = time.perf_counter()
+    updated = scanned = 0
+    
+    for fingerprint, video_ids in groups.items():
+        old = cache.get_roster(fingerprint) if fingerprint else None
+        if old is None or roster_fuzzy(old) != roster_fuzzy(ROSTER_ENTRIES):
+            # Entry predates fingerprints, or was matched with fuzzy matching
+            # switched the other way: every name needs a scan
+            changed = set(ALL_PLAYERS)
+        else:
+            changed = changed_players(parse_roster_entries(old))
+        changed_names = [player for player in ALL_PLAYERS if player in changed]
+        matcher = get_matcher(changed_names, ALIASES) if changed_names else None
+        needles = None
+        if matcher and not FUZZY and len(matcher.surfaces) <= PREFILTER_MAX_NAMES:
+            needles = {
+                match.group().lower() for match in map(WORD_RE.search, matcher.surfaces) if match
             }
-            continue
+        print(f"Roster change: {len(changed)} players to re-match in {len(video_ids)} cached videos")
         
-        mentions = find_mentions(transcript, ALL_PLAYERS)
-        
-        # Cache the result
-        cache['processed_videos'][video_id] = {
-            'hash': video_hash,
-            'mentions': mentions,
-            'processed_date': datetime.utcnow().isoformat()
-        }
-        
-        if mentions:
-            total = sum(len(m) for m in mentions.values())
-            print(f"    Found {total} mentions of {len(mentions)} players")
-            indexed.append({
-                'videoId': video['id'],
-                'title': video['title'],
-                'date': video['date'],
-                'thumbnail': video['thumbnail'],
-                'channel': name,
-                'mentions': mentions
-            })
-        else:
-            print("    No player mentions found")
+        with cache.batch():
+            for video_id in video_ids:
+                entry = cache.get(video_id)
+                mentions = canonical_mentions(entry['mentions'])
+                # Mentions of a removed, renamed or re-aliased player
+                rematch = old is None or any(
+                    NAMES.get(name) != name or name in changed for name in entry['mentions']
+                )
+                
+                if rematch or matcher:
+                    text = store.get_text(video_id)
+                    if text is None:
+                        # Nothing to scan; keep the old fingerprint so the
+                        # changed players are still pending if a transcript turns up
+                        cache.update(video_id, mentions=mentions)
+                        continue
+                    if not rematch and (needles is None or any(needle in text.lower() for needle in needles)):
+                        segments = parse_segments(text)
+                        if needles:
+                            segments = prefilter_segments(segments, needles, matcher.depth)
+                        # Unfiltered, so a changed name that would lose on context still counts
+                        rematch = any(player in changed for player in find_mentions(segments, matcher, fuzzy=FUZZY))
+                    if rematch:
+                        scanned += 1
+                        mentions = find_mentions(parse_segments(text), ALL_PLAYERS, ALIASES, AMBIGUITY, FUZZY)
+                
+                cache.update(video_id, mentions=mentions, roster=ROSTER)
+                updated += 1
+    
+    cache.prune_rosters(ROSTER)
     
-    print(f"Cache hits: {cache_hits}, New videos: {new_count}")
-    cache['stats']['cache_hits'] += cache_hits
-    cache['stats']['new_videos'] += new_count
+    elapsed = time.perf_counter() - start
+    print(f"Updated {updated} cached videos ({scanned} transcripts scanned) in {elapsed:.2f}s")
+
+def init_match_worker(fuzzy):
+    """Build the matcher once when a worker process starts."""
+    use_fuzzy(fuzzy)
+    get_matcher(ALL_PLAYERS, ALIASES)
+
+def match_blobs(chunk):
+    """Match a chunk of (video_id, blob) pairs from the transcript store.
     
-    return indexed
+    Returns (video_id, mentions, segments, seconds) for each; runs in
+    worker processes, where the matcher is cached after the first call.
+    """
+    results = []
+    for video_id, blob in chunk:
+        transcript = decode_segments(blob)
+        start = time.perf_counter()
+        mentions = find_mentions(transcript, ALL_PLAYERS, ALIASES, AMBIGUITY, FUZZY)
+        results.append((video_id, mentions, len(transcript), time.perf_counter() - start))
+    return results
+
+def chunked(items, size):
+    items = iter(items)
+    chunk = list(islice(items, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, size))
+
+def ordered_map(pool, fn, items, window):
+    """Like pool.map, in input order, but with at most window tasks queued."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
-def main():
-    if not API_KEY:
+def rematch_corpus(cache, store, workers=REMATCH_WORKERS):
+    """Re-run matching over every stored transcript without network calls.
+    
+    With several workers, chunks of videos are matched in a process pool.
+    Results are applied in store order either way, so the cache (and the
+    output built from it) is the same as a single-process run.
+    """
+    start = time.perf_counter()
+    videos = segments = mentions_found = 0
+    chunks = chunked(
+        ((video_id, blob) for video_id, blob in store.blobs() if video_id in cache), REMATCH_CHUNK
+    )
+    pool = ProcessPoolExecutor(workers, initializer=init_match_worker, initargs=(FUZZY is not None,)) if workers > 1 else None
+    
+    try:
+        results = ordered_map(pool, match_blobs, chunks, workers * 4) if pool else map(match_blobs, chunks)
+        with cache.batch():
+            for chunk in results:
+                for video_id, mentions, count, seconds in chunk:
+                    found = sum(len(m) for m in mentions.values())
+                    METRICS.observe('match', seconds)
+                    METRICS.count('mentions_found', found)
+                    cache.update(video_id, mentions=mentions, roster=ROSTER)
+                    videos += 1
+                    segments += count
+                    mentions_found += found
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    
+    elapsed = time.perf_counter() - start
+    rate = segments / elapsed if elapsed > 0 else 0
+    print(f"Re-matched {videos} videos ({segments} segments) in {elapsed:.2f}s "
+          f"({rate:,.0f} segments/s, {workers} worker{'s' if workers > 1 else ''}), "
+          f"{mentions_found} mentions")
+
+def index_channels(cache, store, run_id, resume=False, listing=None, fetcher=None, channels=None,
+                   verbose=True, retry_budget=RETRY_BUDGET, refresh=True, backfill_days=BACKFILL_DAYS):
+    """Run the pipeline over every channel and return how many videos had mentions.
+    
+    With resume, channels aren't listed again: only the pending queue left
+    by an interrupted run is processed. Afterwards cached videos without a
+    transcript or a failure record are scheduled for retries, and up to
+    retry_budget videos that had no transcript are fetched again. listing and fetcher default
+    to the live YouTube providers, and channels to CHANNELS. verbose=False
+    drops the per-video console lines, and refresh=False skips re-checking
+    the metadata of older cached videos. backfill_days is how far back a
+    channel without a cursor is listed.
+    """
+    listing = listing or LISTING
+    channels = channels or CHANNELS
+    fetcher = fetcher or TranscriptFetcher()
+    processed = 0
+    
+    def process(video, name, transcript, failure=None):
+        nonlocal processed
+        result = process_video(cache, store, video, name, transcript, failure=failure)
+        processed += 1
+        if processed % CHECKPOINT_EVERY == 0:
+            cache.checkpoint(run_id, processed)
+            print(f"Checkpoint: {processed} videos processed")
+        return result
+    
+    if resume:
+        list_videos = lambda youtube, channel_id: cache.pending_videos(channel_id)
+    else:
+        list_videos = lambda youtube, channel_id: list_new_videos(
+            listing, youtube, channel_id, cache, backfill_days
+        )
+    
+    pipeline = IndexPipeline(
+        channels,
+        fetcher,
+        youtube_factory=listing.new_client,
+        list_videos=list_videos,
+        lookup=lambda video, name: lookup_cached(cache, store, video, name),
+        process=process,
+        verbose=verbose,
+    )
+    
+    found = 0
+    try:
+        for _ in pipeline.run():
+            found += 1
+    finally:
+        cache.checkpoint(run_id, processed)
+    
+    print()
+    pipeline.summary()
+    
+    backfill_failures(cache, store)
+    if retry_budget:
+        with METRICS.timer('retry'):
+            retry_failures(cache, store, fetcher, list(channels), retry_budget)
+    
+    if refresh:
+        with METRICS.timer('metadata'):
+            refresh_metadata(listing, cache, channels)
+    return found
+
+def main(argv=None):
+    """Run the indexer with command line arguments and return an exit code."""
+    parser = argparse.ArgumentParser(description='Index player mentions in YouTube transcripts')
+    parser.add_argument('--rematch', action='store_true',
+                        help='re-match stored transcripts against the current player list (no network)')
+    parser.add_argument('--workers', type=int, default=REMATCH_WORKERS,
+                        help='processes to re-match with, 0 for one per CPU (default %(default)s)')
+    parser.add_argument('--resume', action='store_true',
+                        help='finish the pending queue of an interrupted run without re-listing channels')
+    parser.add_argument('--backfill-days', type=int, default=BACKFILL_DAYS,
+                        help="how far back to list channels not indexed before, 0 for their "
+                             "newest 500 uploads (default %(default)s)")
+    parser.add_argument('--retry-budget', type=int, default=RETRY_BUDGET,
+                        help='videos without a transcript to fetch again this run (default %(default)s)')
+    parser.add_argument('--legacy-output', action='store_true',
+                        help='also write the single-file mentions.json used by older frontends')
+    parser.add_argument('--quiet', action='store_true',
+                        help="don't print a line for every video (faster on large runs)")
+    parser.add_argument('--report', type=Path,
+                        help=f'where to write the JSON run report (default {REPORT_PATH.name} in the cache)')
+    parser.add_argument('--prometheus', type=Path, metavar='PATH',
+                        help='also write run metrics in the Prometheus text format')
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR, help='where to write the output')
+    parser.add_argument('--replay', metavar='CORPUS',
+                        help='list and fetch from a replay corpus (see replay.py) instead of YouTube')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='index from scratch without reading or writing the cache')
+    parser.add_argument('--fuzzy', action=argparse.BooleanOptionalAction, default=FUZZY_MATCHING,
+                        help='also match names spelled by ear in auto-captions (default %(default)s)')
+    args = parser.parse_args(argv)
+    if args.fuzzy != FUZZY_MATCHING:
+        use_fuzzy(args.fuzzy)
+    
+    channels, listing, fetcher = CHANNELS, None, None
+    if args.replay:
+        from replay import ReplayListing, ReplayTranscripts, load_corpus
+        corpus = load_corpus(args.replay)
+        channels = corpus['channels']
+        listing = ReplayListing(corpus)
+        fetcher = TranscriptFetcher(ReplayTranscripts(corpus, latency=0), rate=0)
+    elif not args.rematch and not API_KEY:
         print("Error: Set YOUTUBE_API_KEY environment variable")
         print("   export YOUTUBE_API_KEY='your_key_here'")
-        return
-    
-    print("Starting indexer with caching")
+        return 1
     
-    cache = load_cache()
-    print(f"Cache loaded: {len(cache['processed_videos'])} videos cached")
+    print("Starting indexer without a cache" if args.no_cache else "Starting indexer with caching")
+    print(f"Tracking {len(PRO_PLAYERS)} pro players and {len(FRIENDS)} friends")
+    if not FRIENDS_CONFIGURED:
+        print("Using default friends list. Create friends_config.py to customize.")
+    METRICS.reset()
     
-    youtube = build('youtube', 'v3', developerKey=API_KEY)
+    if args.no_cache:
+        # Held in memory for this run only
+        cache = VideoCache(':memory:', None)
+        store = TranscriptStore(':memory:')
+        report = args.report
+    else:
+        cache = VideoCache()
+        store = TranscriptStore()
+        report = args.report or REPORT_PATH
+    print(f"Cache loaded: {len(cache)} videos cached")
+    print(f"Transcript store: {len(store)} transcripts")
     
     all_data = {
         'lastUpdated': None,
-        'channels': list(CHANNELS.keys()),
+        'channels': list(channels.keys()),
         'players': ALL_PLAYERS,
+        # Streamed from the cache, already in date order, when writing output
         'videos': [],
         'stats': {
             'pro_players': len(PRO_PLAYERS),
@@ -258,41 +616,73 @@ def main():
         }
     }
     
-    for name, channel_id in CHANNELS.items():
-        videos = index_channel_with_cache(youtube, name, channel_id, cache)
-        all_data['videos'].extend(videos)
+    if args.resume:
+        last = cache.last_run()
+        pending = len(cache.pending_videos())
+        if last:
+            print(f"Last run #{last['id']} ({last['status']}): {last['processed']} videos processed")
+        print(f"Pending queue: {pending} videos")
     
-    all_data['videos'].sort(key=lambda x: x['date'], reverse=True)
-    all_data['lastUpdated'] = datetime.utcnow().isoformat() + 'Z'
-    
-    cache['stats']['total_processed'] = len(cache['processed_videos'])
-    cache['last_check'][str(CHANNELS)] = datetime.utcnow().isoformat()
+    mode = 'rematch' if args.rematch else 'resume' if args.resume else 'index'
+    run_id = cache.start_run(mode)
     
-    save_cache(cache)
+    try:
+        if args.rematch:
+            rematch_corpus(cache, store, workers=args.workers or os.cpu_count())
+            cache.put_roster(ROSTER, ROSTER_ENTRIES)
+        else:
+            with METRICS.timer('roster_sync'):
+                sync_roster(cache, store)
+            index_channels(cache, store, run_id, resume=args.resume, listing=listing,
+                           fetcher=fetcher, channels=channels, verbose=not args.quiet,
+                           retry_budget=args.retry_budget, refresh=not args.no_cache,
+                           backfill_days=args.backfill_days)
+        if not args.no_cache:
+            with METRICS.timer('fulltext'):
+                fulltext = FullTextIndex()
+                fulltext.sync(store)
+                fulltext.close()
+    except BaseException:
+        cache.finish_run(run_id, 'interrupted')
+        METRICS.write(report, args.prometheus, run=run_id, mode=mode, status='interrupted',
+                      cache=cache.stats(), failures=cache.failure_counts())
+        cache.close()
+        print("\nRun interrupted - progress is saved, continue with --resume")
+        raise
+    finally:
+        store.close()
     
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    all_data['lastUpdated'] = datetime.utcnow().isoformat() + 'Z'
     
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, indent=2, ensure_ascii=False)
+    cache.set_stat('total_processed', len(cache))
+    if not args.rematch:
+        cache.set_last_check(str(channels), datetime.utcnow().isoformat())
+    cache.finish_run(run_id, 'complete')
     
-    print(f"\\nDone! Indexed {len(all_data['videos'])} videos")
-    print(f"Output: {OUTPUT_PATH}")
+    # Every indexed video is in the cache, including ones listed on earlier runs
+    all_data['videos'] = cached_videos(cache, channels)
+    try:
+        with METRICS.timer('write'):
+            manifest = write_output(all_data, legacy=args.legacy_output, data_dir=args.output_dir,
+                                    rollups=cache.rollups(channels))
+        METRICS.write(report, args.prometheus, run=run_id, mode=mode, status='complete',
+                      cache=cache.stats(), failures=cache.failure_counts())
+    finally:
+        cache.close()
     
-    friend_mentions = set()
-    pro_mentions = set()
-    total_mentions = 0
+    print(f"\nDone! Indexed {manifest['videoCount']} videos")
+    print(f"Output: {args.output_dir / MANIFEST_NAME}")
+    if report:
+        print(f"Run report: {report}")
     
-    for video in all_data['videos']:
-        for player, mentions in video['mentions'].items():
-            total_mentions += len(mentions)
-            if player in FRIENDS:
-                friend_mentions.add(player)
-            else:
-                pro_mentions.add(player)
+    counts = dict(zip(manifest['players'], manifest['mentionCounts']))
+    friend_mentions = {player for player, count in counts.items() if count and player in FRIENDS}
+    pro_mentions = {player for player, count in counts.items() if count and player not in FRIENDS}
     
     print(f"Pro players mentioned: {len(pro_mentions)}")
     print(f"Friends mentioned: {len(friend_mentions)}")
-    print(f"Total mentions: {total_mentions}")
+    print(f"Total mentions: {sum(counts.values())}")
+    return 0
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
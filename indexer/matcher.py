@@ -0,0 +1,271 @@
+"""
+Multi-name matcher for transcript lines.
+Compiles the whole roster into one word-token trie so each caption line is
+scanned once, no matter how many names are tracked.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+WORD_RE = re.compile(r'\w+')
+AMBIGUOUS_MARK = ' [ambiguous]'
+FUZZY_MARK = '[fuzzy] '
+
+
+class NameMatcher:
+    """Case-insensitive whole-word matcher over a list of players.
+
+    Matches like rf'\\b{re.escape(name)}\\b' for every name and alias, but
+    built once and run in a single pass over each line. Aliases resolve to
+    their player, and where names overlap the longest one wins, so
+    'Scrub Killa' is one hit rather than also yielding 'Scrub'.
+    """
+
+    def __init__(self, names, aliases=None):
+        self.names = list(dict.fromkeys(names))
+        self.order = {name: i for i, name in enumerate(self.names)}
+        # Every matchable spelling mapped to the player it refers to
+        self.surfaces = alias_map(self.names, aliases)
+        # Trie keyed on lowercased word tokens. Each node is
+        # (children, terminals) where terminals holds (separators, name)
+        # pairs so 'Roll Dizz' only matches with the same gap as the name.
+        self.root = ({}, [])
+        # Longest name in tokens: how far a hit can reach into later lines
+        self.depth = 1
+        for surface, name in self.surfaces.items():
+            tokens = [m for m in WORD_RE.finditer(surface)]
+            if not tokens:
+                continue
+            seps = tuple(
+                surface[tokens[i].end():tokens[i + 1].start()]
+                for i in range(len(tokens) - 1)
+            )
+            self.depth = max(self.depth, len(tokens))
+            node = self.root
+            for tok in tokens:
+                node = node[0].setdefault(tok.group().lower(), ({}, []))
+            node[1].append((seps, name))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _longest(self, tokens, i):
+        """Return ((end_token, name) or None, open) for the longest hit at tokens[i].
+
+        open is True when the walk ran out of tokens and a longer name
+        could still match once more text arrives.
+        """
+        node = self.root[0].get(tokens[i][0])
+        best = None
+        j = i
+        while node is not None:
+            for seps, name in node[1]:
+                if all(_gap_matches(tokens[i + k], tokens[i + k + 1], sep) for k, sep in enumerate(seps)):
+                    best = (j, name)
+                    break
+            j += 1
+            if not node[0]:
+                return best, False
+            if j >= len(tokens):
+                return best, True
+            node = node[0].get(tokens[j][0])
+        return best, False
+
+    def scan(self, text):
+        """Return every (start, end, name) hit in text, ordered by offset."""
+        return [(start, end, name) for _, start, _, end, name in self.scan_segments([text])]
+
+    def scan_segments(self, texts):
+        """Yield (index, start, end_index, end, name) hits across consecutive texts.
+
+        Each text is matched on its own, but a name may also continue from one
+        text into the next where only whitespace separates its words, as
+        when captions split "Scrub Killa" over two lines. Each hit is
+        reported against the text it starts in. Only tokens that could
+        still begin a longer name are carried over, so texts are never
+        joined.
+        """
+        tokens = []
+        texts = iter(texts)
+        index = -1
+        while True:
+            text = next(texts, None)
+            final = text is None
+            if not final:
+                index += 1
+                tokens.extend(
+                    (m.group().lower(), index, m.start(), m.end(), text) for m in WORD_RE.finditer(text)
+                )
+            children = self.root[0]
+            i = 0
+            while i < len(tokens):
+                if tokens[i][0] not in children:
+                    i += 1
+                    continue
+                best, open_ = self._longest(tokens, i)
+                if open_ and not final:
+                    # Decide once the next text shows whether the name continues
+                    break
+                if best:
+                    j, name = best
+                    yield tokens[i][1], tokens[i][2], tokens[j][1], tokens[j][3], name
+                    i = j + 1
+                else:
+                    i += 1
+            if final:
+                return
+            del tokens[:i]
+
+    def names_in(self, text):
+        """Return the distinct players found in text, in roster order."""
+        hits = self.scan(text)
+        if not hits:
+            return []
+        found = {name for _, _, name in hits}
+        return sorted(found, key=self.order.__getitem__)
+
+
+def alias_map(names, aliases=None):
+    """Map every name and alias to its player; aliases of other players are ignored."""
+    surfaces = {name: name for name in names}
+    for name, others in (aliases or {}).items():
+        if name in surfaces:
+            for alias in others:
+                surfaces.setdefault(alias, name)
+    return surfaces
+
+
+def _gap_matches(left, right, sep):
+    """Check the text between two scan_segments tokens against a name separator."""
+    if left[1] == right[1]:
+        return left[4][left[3]:right[2]] == sep
+    # A line break stands in for whitespace only
+    return not sep.strip() and not (left[4][left[3]:] + right[4][:right[2]]).strip()
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(names, aliases):
+    return NameMatcher(names, {name: list(others) for name, others in aliases})
+
+
+def get_matcher(players, aliases=None):
+    """Return a matcher for players, building it at most once per run."""
+    if isinstance(players, NameMatcher):
+        return players
+    key = tuple(sorted((name, tuple(others)) for name, others in (aliases or {}).items()))
+    return _cached_matcher(tuple(players), key)
+
+
+def roster_fingerprint(names):
+    """Short stable hash identifying a set of names."""
+    content = '\n'.join(sorted(set(names)))
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def roster_entries(surfaces, ambiguous=(), fuzzy=None):
+    """Flatten an alias_map into strings ('alias => player') for storage.
+
+    Names in ambiguous (compared case-insensitively) are marked, so changing
+    which names get context-filtered also changes the fingerprint. fuzzy is
+    the fuzzy matcher's minimum confidence, or None with fuzzy matching off;
+    it is stored as an entry of its own for the same reason.
+    """
+    ambiguous = {name.lower() for name in ambiguous}
+    entries = []
+    for surface, name in surfaces.items():
+        entry = surface if surface == name else f"{surface} => {name}"
+        entries.append(entry + AMBIGUOUS_MARK if surface.lower() in ambiguous else entry)
+    if fuzzy is not None:
+        entries.append(f"{FUZZY_MARK}{fuzzy}")
+    return entries
+
+
+def roster_fuzzy(entries):
+    """Return the fuzzy minimum confidence recorded in roster_entries output, or None."""
+    for entry in entries:
+        if entry.startswith(FUZZY_MARK):
+            return float(entry[len(FUZZY_MARK):])
+    return None
+
+
+def parse_roster_entries(entries):
+    """Return {surface: (player, ambiguous)} from roster_entries output."""
+    surfaces = {}
+    for entry in entries:
+        if entry.startswith(FUZZY_MARK):
+            continue
+        ambiguous = entry.endswith(AMBIGUOUS_MARK)
+        if ambiguous:
+            entry = entry[:-len(AMBIGUOUS_MARK)]
+        surface, _, name = entry.partition(' => ')
+        surfaces[surface] = (name or surface, ambiguous)
+    return surfaces
+
+
+def format_timestamp(seconds):
+    """Format seconds as M:SS or H:MM:SS."""
+    mins, secs = divmod(int(seconds), 60)
+    hours, mins = divmod(mins, 60)
+    if hours > 0:
+        return f"{hours}:{mins:02d}:{secs:02d}"
+    return f"{mins}:{secs:02d}"
+
+
+def find_mentions(transcript, players, aliases=None, ambiguity=None, fuzzy=None):
+    """Find all player mentions in a transcript, keyed by player.
+
+    Names split across consecutive caption lines are found too; the mention
+    gets the time of the line the name starts on and the text of every line
+    it spans. Hits on common-word names are passed through ambiguity (an
+    AmbiguityFilter) when one is given. With a FuzzyMatcher as fuzzy, words
+    the exact pass didn't match are looked up there as well, and those
+    mentions carry a 'confidence' below 1.
+    """
+    matcher = get_matcher(players, aliases)
+    segments = list(transcript)
+    texts = [entry.text for entry in segments]
+    hits = list(matcher.scan_segments(texts))
+    exact = hits
+    if ambiguity:
+        hits = ambiguity.filter(texts, hits)
+    # Segment index -> {name: index of the last segment the hit reaches}
+    found = {}
+    for index, _, end_index, _, name in hits:
+        names = found.setdefault(index, {})
+        names[name] = max(names.get(name, index), end_index)
+
+    confidence = {}
+    if fuzzy:
+        covered = {}
+        for index, start, end_index, end, _ in exact:
+            covered.setdefault(index, []).append((start, len(texts[index]) if end_index > index else end))
+            if end_index > index:
+                covered.setdefault(end_index, []).append((0, end))
+        for index, text in enumerate(texts):
+            for _, _, name, score in fuzzy.scan(text, covered.get(index, ())):
+                names = found.setdefault(index, {})
+                if name not in names or (index, name) in confidence:
+                    names[name] = index
+                    confidence[(index, name)] = max(score, confidence.get((index, name), 0))
+
+    mentions = {}
+    for index in sorted(found):
+        entry = segments[index]
+        timestamp = format_timestamp(entry.start)
+        names = found[index]
+        for player in sorted(names, key=matcher.order.__getitem__):
+            end_index = names[player]
+            text = entry.text
+            if end_index > index:
+                text = ' '.join(seg.text for seg in segments[index:end_index + 1])
+            mention = {
+                'time': timestamp,
+                'seconds': int(entry.start),
+                'text': text
+            }
+            if (index, player) in confidence:
+                mention['confidence'] = round(confidence[(index, player)], 2)
+            mentions.setdefault(player, []).append(mention)
+
+    return mentions
@@ -0,0 +1,152 @@
+"""
+Columnar mention table.
+Holds every mention of a corpus as one row in parallel typed arrays
+(video index, player ID, seconds, segment ID, confidence) instead of a
+dict per mention. Video fields are columns too, players and channels are
+interned to IDs, and each caption text is stored once in a segment table,
+so a line naming two players costs one string. Display fields such as the
+'time' string are only built again when videos are exported.
+
+Mentions of one video are contiguous and in the order they were added.
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate, chain, compress
+from operator import ne, or_
+
+from matcher import format_timestamp
+
+# Confidence is kept in hundredths; exact matches have no confidence
+EXACT = 255
+
+
+class MentionTable:
+    """Parallel arrays of mentions plus the video, player and text tables they index."""
+
+    def __init__(self, players=(), channels=()):
+        self.players = list(dict.fromkeys(players))
+        self.channels = list(dict.fromkeys(channels))
+        self.player_ids = {name: i for i, name in enumerate(self.players)}
+        self.channel_ids = {name: i for i, name in enumerate(self.channels)}
+        self.segments = []
+        self.segment_ids = {}
+
+        # One entry per video
+        self.video_ids = []
+        self.titles = []
+        self.dates = []
+        self.thumbnails = []
+        self.video_channel = array('I')
+
+        # One entry per mention
+        self.video = array('I')
+        self.player = array('I')
+        self.seconds = array('I')
+        self.segment = array('I')
+        self.confidence = array('B')
+
+    @classmethod
+    def from_videos(cls, videos, players=(), channels=()):
+        """Build a table from output entries (as indexed_video returns them)."""
+        table = cls(players, channels)
+        for video in videos:
+            table.add(video)
+        return table
+
+    def _intern(self, ids, names, name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def add(self, video):
+        """Append an output entry and its mentions; returns the video's index."""
+        index = len(self.video_ids)
+        self.video_ids.append(video['videoId'])
+        self.titles.append(video['title'])
+        self.dates.append(video['date'])
+        self.thumbnails.append(video['thumbnail'])
+        self.video_channel.append(self._intern(self.channel_ids, self.channels, video['channel']))
+
+        for name, mentions in video['mentions'].items():
+            player_id = self._intern(self.player_ids, self.players, name)
+            for mention in mentions:
+                self.video.append(index)
+                self.player.append(player_id)
+                self.seconds.append(mention['seconds'])
+                self.segment.append(self._intern(self.segment_ids, self.segments, mention['text']))
+                confidence = mention.get('confidence')
+                self.confidence.append(EXACT if confidence is None else round(confidence * 100))
+        return index
+
+    def __len__(self):
+        return len(self.video)
+
+    @property
+    def video_count(self):
+        return len(self.video_ids)
+
+    def mention_counts(self):
+        """Mentions per player, as a list indexed by player ID."""
+        counts = Counter(self.player)
+        return [counts[i] for i in range(len(self.players))]
+
+    def video_counts(self):
+        """Videos mentioning each player, as a list indexed by player ID."""
+        # A player's mentions in a video are contiguous, so count the rows
+        # where the video or the player changes
+        starts = map(or_, map(ne, self.video, chain((-1,), self.video)),
+                     map(ne, self.player, chain((-1,), self.player)))
+        counts = Counter(compress(self.player, starts))
+        return [counts[i] for i in range(len(self.players))]
+
+    def channel_video_counts(self):
+        """Videos per channel, as a list indexed by channel ID."""
+        counts = Counter(self.video_channel)
+        return [counts[i] for i in range(len(self.channels))]
+
+    def nbytes(self):
+        """Bytes held by the typed arrays (not the strings in the tables)."""
+        columns = (self.video_channel, self.video, self.player, self.seconds, self.segment, self.confidence)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def offsets(self):
+        """Row where each video's mentions start, followed by the row count."""
+        counts = Counter(self.video)
+        return array('I', accumulate((counts[i] for i in range(self.video_count)), initial=0))
+
+    def player_rows(self):
+        """Rows of each player's mentions in table order, indexed by player ID."""
+        rows = [array('I') for _ in self.players]
+        for row, player_id in enumerate(self.player):
+            rows[player_id].append(row)
+        return rows
+
+    def entry(self, index, rows):
+        """Build the output entry for a video from some of its mention rows."""
+        mentions = {}
+        for row in rows:
+            seconds = self.seconds[row]
+            mention = {
+                'time': format_timestamp(seconds),
+                'seconds': seconds,
+                'text': self.segments[self.segment[row]]
+            }
+            if self.confidence[row] != EXACT:
+                mention['confidence'] = self.confidence[row] / 100
+            mentions.setdefault(self.players[self.player[row]], []).append(mention)
+        return {
+            'videoId': self.video_ids[index],
+            'title': self.titles[index],
+            'date': self.dates[index],
+            'thumbnail': self.thumbnails[index],
+            'channel': self.channels[self.video_channel[index]],
+            'mentions': mentions
+        }
+
+    def videos(self):
+        """Yield output entries in table order, formatting display fields as they go."""
+        offsets = self.offsets()
+        for index in range(self.video_count):
+            yield self.entry(index, range(offsets[index], offsets[index + 1]))
@@ -0,0 +1,161 @@
+"""
+Run metrics.
+Counters and per-stage timing histograms shared by every module through
+METRICS, written at the end of a run as a JSON report and optionally in the
+Prometheus text format (e.g. for node_exporter's textfile collector).
+
+Stages timed: list, fetch, match, write, plus one-off steps such as
+roster_sync and fulltext. Counters include YouTube API quota units spent,
+fetch retries and backoff, and bytes written.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+PROMETHEUS_PREFIX = 'rocketscope'
+
+
+class Histogram:
+    """Bucketed durations with a running count, sum and maximum."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (the max past the last bound)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'seconds': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'max': round(self.max, 6),
+            'buckets': {
+                ('+Inf' if math.isinf(bound) else str(bound)): count
+                for bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+class Metrics:
+    """Thread-safe counters and stage timers for one run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = datetime.utcnow()
+            self.clock = time.perf_counter()
+            self.counters = {}
+            self.timers = {}
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            if stage not in self.timers:
+                self.timers[stage] = Histogram()
+            self.timers[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as one observation of stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def report(self, **extra):
+        """Return the run report as a dict; extra keys are added as given."""
+        with self.lock:
+            counters = {
+                name: round(value, 3) if isinstance(value, float) else value
+                for name, value in sorted(self.counters.items())
+            }
+            timers = {stage: histogram.summary() for stage, histogram in sorted(self.timers.items())}
+            return {
+                'started': self.started.isoformat() + 'Z',
+                'elapsed': round(time.perf_counter() - self.clock, 3),
+                **extra,
+                'stages': timers,
+                'counters': counters,
+            }
+
+    def prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Return counters and stage histograms in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+            metric = f"{prefix}_stage_seconds"
+            if self.timers:
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in sorted(self.timers.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if math.isinf(bound) else bound
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+            lines.append(f"# TYPE {prefix}_run_seconds gauge")
+            lines.append(f"{prefix}_run_seconds {time.perf_counter() - self.clock:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=None, prometheus_path=None, **extra):
+        """Write the JSON report and/or Prometheus text via temp file and rename."""
+        if path:
+            _replace_text(path, json.dumps(self.report(**extra), indent=2))
+        if prometheus_path:
+            _replace_text(prometheus_path, self.prometheus())
+
+
+def _replace_text(path, text):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+METRICS = Metrics()
@@ -0,0 +1,172 @@
+"""
+Multi-channel indexing pipeline.
+Lists every channel concurrently and feeds one shared transcript fetch and
+matching queue, yielding indexed videos as soon as each one is ready.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+
+LIST_WORKERS = 4
+
+# Returned by a lookup hook when a video still needs a transcript
+MISS = object()
+
+
+class ChannelProgress:
+    """Per-channel counters used for progress and throughput reporting."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.finished = None
+        self.listed = 0
+        self.cached = 0
+        self.fetched = 0
+        self.indexed = 0
+        self.mentions = 0
+
+    @property
+    def done(self):
+        return self.cached + self.fetched
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def record(self, video):
+        if video:
+            self.indexed += 1
+            self.mentions += sum(len(m) for m in video['mentions'].values())
+        if self.done == self.listed:
+            self.finished = time.monotonic()
+
+    def summary(self):
+        return (f"{self.name}: {self.done}/{self.listed} videos "
+                f"({self.cached} cached, {self.fetched} fetched), "
+                f"{self.indexed} with mentions, {self.mentions} mentions, "
+                f"{self.elapsed:.1f}s, {self.rate:.1f} videos/s")
+
+
+class IndexPipeline:
+    """Index several channels at once through one shared fetch queue.
+
+    list_videos(youtube, channel_id) returns a channel's videos. lookup(video,
+    name) returns an indexed video, None, or MISS when a transcript is needed;
+    process(video, name, transcript, failure) turns a fetch result into an
+    indexed video or None, failure saying why there is no transcript.
+    youtube_factory builds one API client per listing thread, since
+    googleapiclient clients are not thread-safe. With verbose off, the two
+    console lines per video are skipped.
+    """
+
+    def __init__(self, channels, fetcher, youtube_factory, list_videos, process,
+                 lookup=None, list_workers=LIST_WORKERS, verbose=True):
+        self.channels = channels
+        self.fetcher = fetcher
+        self.youtube_factory = youtube_factory
+        self.list_videos = list_videos
+        self.process = process
+        self.lookup = lookup or (lambda video, name: MISS)
+        self.list_workers = list_workers
+        self.verbose = verbose
+        self.progress = {name: ChannelProgress(name) for name in channels}
+        self.local = threading.local()
+
+    def _youtube(self):
+        youtube = getattr(self.local, 'youtube', None)
+        if youtube is None:
+            youtube = self.local.youtube = self.youtube_factory()
+        return youtube
+
+    def _list(self, channel_id):
+        with METRICS.timer('list'):
+            return self.list_videos(self._youtube(), channel_id)
+
+    def _report(self, progress, video, status):
+        if not self.verbose:
+            return
+        print(f"[{progress.name} {progress.done}/{progress.listed}] {video['title'][:50]}...")
+        print(f"    {status}")
+
+    def run(self):
+        """Yield indexed videos from every channel as they complete."""
+        events = queue.Queue()
+        outstanding = 0
+        stop = threading.Event()
+        list_pool = ThreadPoolExecutor(max_workers=self.list_workers)
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetcher.workers)
+
+        try:
+            for name, channel_id in self.channels.items():
+                future = list_pool.submit(self._list, channel_id)
+                future.add_done_callback(lambda f, name=name: events.put(('listed', name, None, f)))
+                outstanding += 1
+
+            while outstanding:
+                kind, name, video, future = events.get()
+                outstanding -= 1
+                progress = self.progress[name]
+
+                if kind == 'listed':
+                    try:
+                        videos = future.result()
+                    except Exception as e:
+                        print(f"Error listing {name}: {e}")
+                        videos = []
+                    progress.listed = len(videos)
+                    METRICS.count('videos_listed', len(videos))
+                    print(f"Found {len(videos)} videos for {name}")
+                    if not videos:
+                        progress.finished = time.monotonic()
+
+                    for video in videos:
+                        result = self.lookup(video, name)
+                        if result is MISS:
+                            fetch = fetch_pool.submit(self.fetcher.fetch_result, video['id'], stop)
+                            fetch.add_done_callback(
+                                lambda f, name=name, video=video: events.put(('fetched', name, video, f))
+                            )
+                            outstanding += 1
+                            continue
+                        progress.cached += 1
+                        METRICS.count('videos_cached')
+                        progress.record(result)
+                        self._report(progress, video, "Cached" if result else "Cached: No mentions")
+                        if result:
+                            yield result
+                    continue
+
+                transcript, failure = future.result()
+                result = self.process(video, name, transcript, failure)
+                progress.fetched += 1
+                METRICS.count('videos_fetched')
+                progress.record(result)
+                if not transcript:
+                    status = f"No transcript available ({failure.replace('_', ' ')})"
+                elif result:
+                    total = sum(len(m) for m in result['mentions'].values())
+                    status = f"Found {total} mentions of {len(result['mentions'])} players"
+                else:
+                    status = "No player mentions found"
+                self._report(progress, video, status)
+                if result:
+                    yield result
+        finally:
+            # Wake workers sleeping out a backoff so shutdown doesn't wait for it
+            stop.set()
+            list_pool.shutdown(wait=True, cancel_futures=True)
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+
+    def summary(self):
+        """Print progress and throughput for every channel."""
+        for progress in self.progress.values():
+            print(progress.summary())
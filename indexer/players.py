@@ -1,19 +1,16 @@
 """
 List of Rocket League pro players, community figures, and friends to track.
-Add names, common nicknames, and alternate spellings.
+Add players to the lists and their nicknames or alternate spellings to the
+alias maps.
 """
 
 # Pro players and notable figures
 PRO_PLAYERS = [
     # NA Players
     'Firstkiller',
-    'First',  # nickname
-    'Squishy',
     'SquishyMuffinz',
-    'Garrett',
     'GarrettG',
     'jstn',
-    'Justin',
     'Arsenal',
     'Mist',
     'Daniel',
@@ -51,7 +48,6 @@ PRO_PLAYERS = [
     'Kash',
     'Joreuz',
     'Scrub Killa',
-    'Scrub',
     'Exotiik',
     'Atow',
     'Rizex',
@@ -115,22 +111,18 @@ PRO_PLAYERS = [
     # Notable Figures / Content Creators / Coaches
     'Sizz',
     'Rizzo',
-    'Leth',
     'Lethamyr',
     'SunlessKhan',
-    'Sunless',
     'Musty',
     'Flakes',
     'Kronovi',
     'Turbopolsa',
-    'Turbo',
     'Gibbs',
     'Jorby',
     'Achieves',
     'Wavepunk',
     'Lawler',
     'Stumpy',
-    'Johnny',
     'JohnnyBoi',
     'Dazerin',
     'Turtle',
@@ -138,20 +130,49 @@ PRO_PLAYERS = [
     'Gregan',
 ]
 
+# Nicknames and short forms, keyed by the player they refer to. Mentions
+# are recorded under the player, whichever name was said.
+PRO_ALIASES = {
+    'Firstkiller': ['First'],
+    'SquishyMuffinz': ['Squishy'],
+    'GarrettG': ['Garrett'],
+    'jstn': ['Justin'],
+    'Scrub Killa': ['Scrub'],
+    'Lethamyr': ['Leth'],
+    'SunlessKhan': ['Sunless'],
+    'Turbopolsa': ['Turbo'],
+    'JohnnyBoi': ['Johnny'],
+}
+
+# Names (or aliases) that are also everyday words. Hits on these are only
+# kept when the captions around them look like talk about a player.
+AMBIGUOUS_NAMES = [
+    'First', 'Mist', 'Comm', 'Torment', 'Rapid', 'Chrome', 'Memory', 'Chronic',
+    'Aqua', 'Oath', 'Gyro', 'Fig', 'Arsenal', 'Zen', 'rise', 'Fever', 'Express',
+    'Math', 'Taco', 'Burn', 'Musty', 'Flakes', 'Turbo', 'Turtle', 'Achieves',
+]
+
 # Friends list - can be customized via friends_config.py
 try:
     from friends_config import MY_FRIENDS
     FRIENDS = MY_FRIENDS
-    print(f"Loaded {len(FRIENDS)} friends from config")
+    FRIENDS_CONFIGURED = True
+    try:
+        from friends_config import MY_FRIEND_ALIASES as FRIEND_ALIASES
+    except ImportError:
+        FRIEND_ALIASES = {}
 except ImportError:
     # Default friends list if config file doesn't exist
     FRIENDS = [
         'Larry',
-        'Hammy Crackers', 
-        'Hammy',
+        'Hammy Crackers',
         'Jett',
     ]
-    print(f"Using default friends list. Create friends_config.py to customize.")
+    FRIEND_ALIASES = {
+        'Hammy Crackers': ['Hammy'],
+    }
+    FRIENDS_CONFIGURED = False
 
 # Combine all players to track
-ALL_PLAYERS = PRO_PLAYERS + FRIENDS
\ No newline at end of file
+ALL_PLAYERS = PRO_PLAYERS + FRIENDS
+ALIASES = {**PRO_ALIASES, **FRIEND_ALIASES}
\ No newline at end of file
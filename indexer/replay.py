@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Offline replay of channel listings and transcripts.
+A corpus holds each channel's uploads and every video's transcript. It is
+either generated (synthetic_corpus) or recorded once from the live APIs
+(record_corpus) and saved as JSON. ReplayListing and ReplayTranscripts serve
+it through the same provider interfaces as YouTubeListing and
+YouTubeTranscriptProvider, with injected latency and failures, so the
+indexer can be run and timed without an API key or network access.
+
+Run directly to write a corpus:
+    python replay.py synthetic corpus.json [--channels 3] [--videos 100]
+    python replay.py record corpus.json [--videos 50]   (needs YOUTUBE_API_KEY)
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from fetcher import FakeTranscriptProvider, Snippet
+from listing import PAGE_SIZE, VIDEO_BATCH_SIZE, ListingError
+from matcher import WORD_RE
+from metrics import METRICS
+from transcripts import row_segments, segment_rows
+
+CAPTION_WORDS = (
+    'so he goes for the ball off the wall and hits a ceiling shot into the net '
+    'what a save that was kickoff boost rotation demo bump air dribble double '
+    'tap flip reset nice honestly i think this is the best play of the series'
+).split()
+
+
+def synthetic_corpus(players, channel_count=3, videos_per_channel=100, segments=300,
+                     mention_rate=0.05, missing_rate=0.1, days=30, seed=0, aliases=None,
+                     words=CAPTION_WORDS):
+    """Generate a corpus of channels whose captions mention players.
+
+    Uploads are spread over the last days days, newest first, and
+    missing_rate of videos have no transcript. Roughly mention_rate of
+    caption lines name a random player among filler words. Raises
+    ValueError if the filler could spell a player or alias, which would
+    add unplanted mentions.
+    """
+    filler = set(words)
+    names = [*players, *(alias for names in (aliases or {}).values() for alias in names)]
+    clashes = sorted(name for name in names if set(WORD_RE.findall(name.lower())) <= filler)
+    if clashes:
+        raise ValueError(f"Caption filler words spell roster names: {clashes}")
+
+    rng = random.Random(seed)
+    today = date.today()
+    corpus = {'channels': {}, 'videos': {}, 'transcripts': {}}
+    for c in range(channel_count):
+        channel_id = f"UCreplay{c:04d}"
+        corpus['channels'][f"Channel {c}"] = channel_id
+        uploads = []
+        for v in range(videos_per_channel):
+            video_id = f"rp{c:03d}v{v:05d}"
+            uploads.append({
+                'id': video_id,
+                'title': f"Channel {c} video {v}",
+                'date': (today - timedelta(days=days * v // videos_per_channel)).isoformat(),
+                'thumbnail': f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg",
+                'duration': segments * 4,
+            })
+            if rng.random() < missing_rate:
+                corpus['transcripts'][video_id] = None
+                continue
+            lines = []
+            for i in range(segments):
+                line = rng.choices(words, k=rng.randint(6, 12))
+                if rng.random() < mention_rate:
+                    line.insert(rng.randrange(len(line)), rng.choice(players))
+                lines.append(Snippet(' '.join(line), i * 4.0, 4.0))
+            corpus['transcripts'][video_id] = lines
+        corpus['videos'][channel_id] = uploads
+    return corpus
+
+
+def record_corpus(channels, listing, provider, max_videos=50):
+    """Record the newest uploads and transcripts of channels from live providers."""
+    corpus = {'channels': dict(channels), 'videos': {}, 'transcripts': {}}
+    youtube = listing.new_client()
+    client = provider.new_client()
+    for name, channel_id in channels.items():
+        try:
+            uploads = listing.list_videos(youtube, channel_id, max_results=max_videos)
+        except ListingError as e:
+            print(f"{e} - recording the {len(e.videos)} uploads listed for {name}")
+            uploads = e.videos
+        details = listing.video_details(youtube, [video['id'] for video in uploads])
+        corpus['videos'][channel_id] = [
+            {**video, 'duration': details.get(video['id'], {}).get('duration')} for video in uploads
+        ]
+        for video in uploads:
+            try:
+                transcript = provider.fetch(client, video['id'])
+            except Exception as e:
+                print(f"Error getting transcript: {e}")
+                transcript = None
+            corpus['transcripts'][video['id']] = row_segments(segment_rows(transcript)) if transcript else None
+        print(f"Recorded {len(uploads)} videos for {name}")
+    return corpus
+
+
+def _open(path, mode):
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def save_corpus(corpus, path):
+    """Write a corpus as JSON (gzipped if path ends in .gz)."""
+    data = {
+        **corpus,
+        'transcripts': {
+            video_id: segment_rows(transcript) if transcript is not None else None
+            for video_id, transcript in corpus['transcripts'].items()
+        },
+    }
+    with _open(path, 'w') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_corpus(path):
+    """Read a corpus written by save_corpus."""
+    with _open(path, 'r') as f:
+        corpus = json.load(f)
+    corpus['transcripts'] = {
+        video_id: row_segments(rows) if rows is not None else None
+        for video_id, rows in corpus['transcripts'].items()
+    }
+    return corpus
+
+
+class ReplayListing:
+    """Offline listing provider serving a corpus's channel uploads.
+
+    Each page of PAGE_SIZE videos (and each batch of video details) costs
+    latency seconds and fails with probability error_rate, which, as with
+    the live API, ends a listing early with ListingError. Failures are drawn per request,
+    not from a shared sequence, so concurrent runs fail the same way.
+    """
+
+    def __init__(self, corpus, latency=0.0, error_rate=0.0, seed=0):
+        self.videos = corpus['videos']
+        self.details = {
+            video['id']: video for uploads in self.videos.values() for video in uploads
+        }
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.attempts = {}
+        self.clients = 0
+        self.calls = 0
+
+    def new_client(self):
+        with self.lock:
+            self.clients += 1
+            return object()
+
+    def _request(self, key):
+        """Count a request, sleep for its latency, and return False if it fails."""
+        with self.lock:
+            self.calls += 1
+            attempt = self.attempts[key] = self.attempts.get(key, 0) + 1
+        # Charged like the live API, 1 unit per list call
+        METRICS.count('quota_units')
+        time.sleep(self.latency)
+        if random.Random(f"{self.seed}:{key}:{attempt}").random() < self.error_rate:
+            METRICS.count('api_errors')
+            return False
+        return True
+
+    def list_videos(self, client, channel_id, max_results=500, days_back=None, stop_at=None):
+        """Return a channel's uploads newest first, stopping as get_channel_videos does."""
+        cutoff = (date.today() - timedelta(days=days_back)).isoformat() if days_back else None
+        videos = []
+        uploads = self.videos.get(channel_id, [])
+        for start in range(0, len(uploads), PAGE_SIZE):
+            if not self._request(f"{channel_id}:{start}"):
+                raise ListingError("Error listing uploads: injected replay failure", videos)
+            for video in uploads[start:start + PAGE_SIZE]:
+                if stop_at and stop_at(video['id']):
+                    return videos
+                if cutoff and video['date'] < cutoff:
+                    return videos
+                videos.append({key: video[key] for key in ('id', 'title', 'date', 'thumbnail')})
+                if len(videos) >= max_results:
+                    return videos
+        return videos
+
+    def video_details(self, client, video_ids):
+        """Return {video_id: {'title', 'date', 'thumbnail', 'duration'}} for known IDs."""
+        video_ids = list(video_ids)
+        details = {}
+        for start in range(0, len(video_ids), VIDEO_BATCH_SIZE):
+            if not self._request(video_ids[start]):
+                print("Error fetching video details: injected replay failure")
+                continue
+            for video_id in video_ids[start:start + VIDEO_BATCH_SIZE]:
+                if video_id in self.details:
+                    video = self.details[video_id]
+                    details[video_id] = {
+                        key: video.get(key) for key in ('title', 'date', 'thumbnail', 'duration')
+                    }
+        return details
+
+
+class ReplayTranscripts(FakeTranscriptProvider):
+    """Offline transcript provider serving a corpus's transcripts.
+
+    Takes FakeTranscriptProvider's latency, jitter and failure options;
+    videos recorded without a transcript return None. Outcomes are drawn
+    per video and attempt, so each video meets the same failures however
+    fetches interleave across threads.
+    """
+
+    def __init__(self, corpus, seed=0, **options):
+        super().__init__(corpus['transcripts'], seed=seed, **options)
+        self.seed = seed
+        self.attempts = {}
+
+    def fetch(self, client, video_id):
+        with self.lock:
+            self.calls += 1
+            attempt = self.attempts[video_id] = self.attempts.get(video_id, 0) + 1
+        rng = random.Random(f"{self.seed}:{video_id}:{attempt}")
+        time.sleep(self.latency + rng.uniform(0, self.jitter))
+
+        roll = rng.random()
+        if roll < self.block_rate:
+            raise RuntimeError(self.BLOCKED_MESSAGE)
+        roll -= self.block_rate
+        if roll < self.error_rate:
+            raise RuntimeError(f"Injected error for {video_id}")
+        roll -= self.error_rate
+        if roll < self.missing_rate:
+            return None
+        return self.transcripts.get(video_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a replay corpus for offline runs')
+    parser.add_argument('source', choices=['synthetic', 'record'])
+    parser.add_argument('path', help='corpus file to write (.json or .json.gz)')
+    parser.add_argument('--channels', type=int, default=3, help='synthetic channels')
+    parser.add_argument('--videos', type=int, default=100, help='videos per channel')
+    parser.add_argument('--segments', type=int, default=300, help='caption lines per synthetic video')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.source == 'synthetic':
+        from players import ALL_PLAYERS, ALIASES
+        corpus = synthetic_corpus(
+            ALL_PLAYERS, args.channels, args.videos, args.segments, seed=args.seed, aliases=ALIASES
+        )
+    else:
+        from fetcher import YouTubeTranscriptProvider
+        from listing import YouTubeListing
+        from main import API_KEY, CHANNELS
+        if not API_KEY:
+            print("Error: Set YOUTUBE_API_KEY environment variable")
+            return 1
+        corpus = record_corpus(CHANNELS, YouTubeListing(API_KEY), YouTubeTranscriptProvider(), args.videos)
+
+    save_corpus(corpus, args.path)
+    videos = sum(len(uploads) for uploads in corpus['videos'].values())
+    print(f"Wrote {len(corpus['channels'])} channels, {videos} videos to {args.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Retry schedule for videos fetched without a transcript.
+Each failure kind gets a first wait that doubles with every failed attempt
+(up to RETRY_MAX_HOURS) and a base priority, the rough odds that a retry
+succeeds: a rate-limited fetch almost always works later, fresh uploads
+usually get auto-captions within a day, and disabled captions rarely come
+back. Priority halves with each failed attempt, so each run spends its
+retry budget on the likeliest recoveries first. After MAX_ATTEMPTS a
+video is no longer retried.
+"""
+
+from datetime import datetime, timedelta
+
+from fetcher import DISABLED, ERROR, RATE_LIMITED, UNAVAILABLE
+
+# failure: (hours before the first retry, base priority)
+RETRY_POLICY = {
+    RATE_LIMITED: (1, 0.9),
+    UNAVAILABLE: (6, 0.6),
+    ERROR: (12, 0.4),
+    DISABLED: (7 * 24, 0.1),
+}
+
+RETRY_MAX_HOURS = 30 * 24
+MAX_ATTEMPTS = 8
+
+
+def schedule(failure, attempts, now=None):
+    """Return (next retry as ISO time or None to stop, priority) after attempts failures."""
+    now = now or datetime.utcnow()
+    hours, priority = RETRY_POLICY[failure]
+    if attempts >= MAX_ATTEMPTS:
+        return None, 0.0
+    wait = min(hours * 2 ** (attempts - 1), RETRY_MAX_HOURS)
+    return (now + timedelta(hours=wait)).isoformat(), round(priority * 0.5 ** (attempts - 1), 6)
@@ -0,0 +1,66 @@
+"""
+Analytics rollups.
+The cache keeps materialized counts next to the videos: mentions and
+videos per (player, channel, week), and videos per (player, other player,
+channel) pair mentioned together. Writing a video subtracts its old
+contribution and adds the new one, so the rollups never need a rescan.
+This module turns one entry into its contribution and the cache's rows
+into the compact rollups.json shipped beside the manifest.
+"""
+
+from datetime import date, timedelta
+
+ROLLUP_VERSION = 1
+
+# Most co-mentioned pairs kept in rollups.json (the cache keeps them all)
+ROLLUP_PAIRS = 1000
+
+
+def week_of(day):
+    """Monday of the week a YYYY-MM-DD date falls in ('' if unknown)."""
+    if not day:
+        return ''
+    start = date.fromisoformat(day[:10])
+    return (start - timedelta(days=start.weekday())).isoformat()
+
+
+def contribution(entry):
+    """Return ({(player, channel, week): mentions}, [(player, other, channel), ...]) for a cache entry."""
+    channel = entry.get('channel') or ''
+    week = week_of(entry.get('date'))
+    mentions = {player: len(hits) for player, hits in (entry.get('mentions') or {}).items() if hits}
+    players = sorted(mentions)
+    counts = {(player, channel, week): count for player, count in mentions.items()}
+    pairs = [(a, b, channel) for i, a in enumerate(players) for b in players[i + 1:]]
+    return counts, pairs
+
+
+def rollup_table(rollups, players, channels, pair_limit=ROLLUP_PAIRS):
+    """Build the rollups.json table from VideoCache.rollups() rows.
+
+    Players and channels are referenced by their index in the manifest
+    lists; names missing from them are left out.
+    """
+    player_ids = {name: i for i, name in enumerate(players)}
+    channel_ids = {name: i for i, name in enumerate(channels)}
+    weeks = sorted({week for _, week, _, _ in rollups['weeks'] if week})
+    week_ids = {week: i for i, week in enumerate(weeks)}
+    pairs = sorted(
+        (row for row in rollups['pairs'] if row[0] in player_ids and row[1] in player_ids),
+        key=lambda row: (-row[2], row[0], row[1])
+    )
+    return {
+        'version': ROLLUP_VERSION,
+        'weeks': weeks,
+        'playerWeeks': [
+            [player_ids[player], week_ids[week], mentions, videos]
+            for player, week, mentions, videos in rollups['weeks']
+            if player in player_ids and week in week_ids
+        ],
+        'playerChannels': [
+            [player_ids[player], channel_ids[channel], mentions, videos]
+            for player, channel, mentions, videos in rollups['channels']
+            if player in player_ids and channel in channel_ids
+        ],
+        'pairs': [[player_ids[a], player_ids[b], videos] for a, b, videos in pairs[:pair_limit]],
+    }
@@ -2,30 +2,80 @@
 """
 RocketScope Indexer
 Run this to update the player mention database.
+
+Commands run in this process and only import what they need, so export
+and rematch start without loading the YouTube client libraries:
+
+    python run.py index [--resume] [--quiet] ...   list channels and match new videos
+    python run.py rematch                          re-match stored transcripts offline
+    python run.py export [mentions.json]           convert mentions.json into shards
+    python run.py serve [--port 8765]              answer mention queries over local HTTP
+    python run.py bench [name] [args]              run bench_<name>.py (no name lists them)
+
+With no command (or only options) it runs index, as it always has.
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
-def main():
-    """Run the main indexer."""
-    indexer_path = Path(__file__).parent / 'main.py'
-    
-    print("RocketScope Indexer")
-    print("This will search for player mentions in YouTube videos.")
-    print()
-    
+COMMANDS = ['index', 'rematch', 'export', 'serve', 'bench']
+
+
+def benchmarks():
+    return sorted(path.stem[len('bench_'):] for path in Path(__file__).parent.glob('bench_*.py'))
+
+
+def run_bench(argv):
+    names = benchmarks()
+    if not argv or argv[0] not in names:
+        print(f"Benchmarks: {', '.join(names)}")
+        print("Usage: python run.py bench <name> [args]")
+        return 0 if not argv else 1
+    from importlib import import_module
+    module = import_module(f"bench_{argv[0]}")
+    # Benchmarks read their own options from sys.argv
+    sys.argv = [module.__file__, *argv[1:]]
+    return module.main()
+
+
+def run(command, argv):
+    """Run a command in this process and return its exit code."""
+    if command == 'export':
+        import export
+        return export.main(argv)
+    if command == 'serve':
+        import serve
+        return serve.main(argv)
+    if command == 'bench':
+        return run_bench(argv)
+
+    import main as indexer
+    if command == 'rematch':
+        argv = ['--rematch', *argv]
+    return indexer.main(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = 'index'
+    if argv and argv[0] in COMMANDS:
+        command, argv = argv[0], argv[1:]
+    elif argv and not argv[0].startswith('-'):
+        print(f"Unknown command: {argv[0]} (expected one of {', '.join(COMMANDS)})")
+        return 2
+
+    if command == 'index':
+        print("RocketScope Indexer")
+        print("This will search for player mentions in YouTube videos.")
+        print()
+
     try:
-        subprocess.run([sys.executable, str(indexer_path)], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Indexer failed with exit code {e.returncode}")
-        return 1
+        return run(command, argv) or 0
     except KeyboardInterrupt:
-        print("\\nIndexing interrupted by user")
+        if command == 'index':
+            print("\nIndexing interrupted by user - run again with --resume to continue")
         return 1
-    
-    return 0
+
 
 if __name__ == '__main__':
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Prebuilt search index for the web UI.
+Maps every prefix of a player's normalized name (and of each word in it)
+to player IDs, so a keystroke is one table lookup. The player shards
+written by export.py are the posting lists: (video, seconds) rows per
+player, already in date order.
+"""
+
+import re
+import unicodedata
+
+INDEX_VERSION = 1
+MAX_PREFIX = 12
+TOP_PLAYERS = 50
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """Lowercase, strip accents, and collapse punctuation to single spaces.
+
+    Must match normalize() in frontend/src/App.jsx.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _SEPARATORS.sub(' ', text.lower()).strip()
+
+
+def name_starts(name):
+    """Return the suffixes of a normalized name that start at a word."""
+    starts = [name]
+    for match in re.finditer(' ', name):
+        starts.append(name[match.end():])
+    return starts
+
+
+def build_search_index(players, mention_counts, video_counts):
+    """Build the prefix table, totals and rankings for a player table.
+
+    Only players with mentions are indexed. IDs are positions in players.
+    """
+    names = [normalize(player) for player in players]
+    prefixes = {}
+
+    for player_id, name in enumerate(names):
+        if not mention_counts[player_id]:
+            continue
+        for start in name_starts(name):
+            for length in range(1, min(len(start), MAX_PREFIX) + 1):
+                ids = prefixes.setdefault(start[:length], [])
+                if not ids or ids[-1] != player_id:
+                    ids.append(player_id)
+
+    ranked = sorted(
+        (i for i, count in enumerate(mention_counts) if count),
+        key=lambda i: (-mention_counts[i], players[i].lower())
+    )
+    # Within each prefix, best-known players first
+    rank = {player_id: i for i, player_id in enumerate(ranked)}
+    for ids in prefixes.values():
+        ids.sort(key=rank.__getitem__)
+
+    return {
+        'version': INDEX_VERSION,
+        'maxPrefix': MAX_PREFIX,
+        'names': names,
+        'prefixes': prefixes,
+        'totals': list(mention_counts),
+        'videoTotals': list(video_counts),
+        'top': ranked[:TOP_PLAYERS],
+    }
+
+
+def search(index, query):
+    """Return player IDs whose name (or a word in it) starts with query."""
+    q = normalize(query)
+    if not q:
+        return []
+    ids = index['prefixes'].get(q[:index['maxPrefix']], [])
+    if len(q) <= index['maxPrefix']:
+        return ids
+    names = index['names']
+    return [i for i in ids if any(start.startswith(q) for start in name_starts(names[i]))]
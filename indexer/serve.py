@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Local mention query service.
+Loads the video cache (or a mentions.json) into a MentionTable once and
+answers JSON queries over HTTP, so clients fetch one page of results
+instead of the whole dataset:
+
+    GET /players?prefix=vat[&limit=20]        players by name prefix, with totals
+    GET /mentions?player=Vatira&player=...    videos mentioning players, newest first
+                 [&prefix=vat][&channel=...][&since=YYYY-MM-DD][&until=YYYY-MM-DD]
+                 [&page=1][&per_page=20]
+    GET /channels                             channels with video counts
+    GET /status                               what is loaded and query cache stats
+    GET /metrics                              counters in the Prometheus text format
+
+Result sets of recent queries are kept in a bounded LRU cache. The source
+file is watched and reloaded in the background when it changes, and
+queries keep being answered from the previous data until the new table
+is ready.
+
+Usage:
+    python serve.py [--source cache/video_cache.db] [--port 8765]
+"""
+
+import argparse
+import heapq
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from cache import CACHE_DB_PATH, VideoCache
+from mention_table import MentionTable
+from metrics import METRICS
+from search_index import build_search_index, search
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Distinct queries whose result sets are kept
+QUERY_CACHE_SIZE = 512
+
+# Seconds between checks of the source file for changes
+RELOAD_CHECK_SECONDS = 2.0
+
+PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, size=QUERY_CACHE_SIZE):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                METRICS.count('query_cache_hits')
+                return self.items[key]
+            self.misses += 1
+        METRICS.count('query_cache_misses')
+        value = compute()
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.items), 'capacity': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+def source_files(source):
+    """Files whose changes mean the source has changed (SQLite keeps a -wal beside the database)."""
+    source = Path(source)
+    if source.suffix == '.json':
+        return [source]
+    return [source, source.with_name(source.name + '-wal')]
+
+
+def source_version(source):
+    return tuple(
+        (path.stat().st_mtime_ns, path.stat().st_size) if path.exists() else None
+        for path in source_files(source)
+    )
+
+
+def load_table(source):
+    """Read a video cache database or a mentions.json into a MentionTable, newest first."""
+    source = Path(source)
+    if source.suffix == '.json':
+        with open(source, 'r', encoding='utf-8') as f:
+            all_data = json.load(f)
+        return MentionTable.from_videos(all_data['videos'], channels=all_data['channels'])
+
+    cache = VideoCache(source, None)
+    try:
+        return MentionTable.from_videos(
+            {
+                'videoId': video_id,
+                'title': entry['title'],
+                'date': entry['date'],
+                'thumbnail': entry['thumbnail'],
+                'channel': entry['channel'],
+                'mentions': entry['mentions'],
+            }
+            for video_id, entry in cache.entries(with_mentions=True, newest_first=True)
+        )
+    finally:
+        cache.close()
+
+
+class Snapshot:
+    """A loaded table with the lookups queries need and its own result cache."""
+
+    def __init__(self, table, version, cache_size=QUERY_CACHE_SIZE):
+        self.table = table
+        self.version = version
+        self.loaded = datetime.utcnow().isoformat() + 'Z'
+        self.offsets = table.offsets()
+        self.player_rows = table.player_rows()
+        self.mention_counts = table.mention_counts()
+        self.video_counts = table.video_counts()
+        self.search = build_search_index(table.players, self.mention_counts, self.video_counts)
+        self.channel_ids = table.channel_ids
+        self.results = LRUCache(cache_size)
+
+    def player_ids(self, names, prefix):
+        ids = {self.table.player_ids[name] for name in names if name in self.table.player_ids}
+        if prefix:
+            ids.update(search(self.search, prefix))
+        return sorted(ids)
+
+    def select(self, players, channel, since, until):
+        """Return [(video index, mention rows), ...] newest first for a filter."""
+        table = self.table
+        channel_id = self.channel_ids.get(channel) if channel else None
+        if channel and channel_id is None:
+            return []
+
+        def wanted(index):
+            if channel_id is not None and table.video_channel[index] != channel_id:
+                return False
+            day = table.dates[index][:10]
+            return (not since or day >= since) and (not until or day <= until)
+
+        if players is None:
+            return [
+                (index, range(self.offsets[index], self.offsets[index + 1]))
+                for index in range(table.video_count) if wanted(index)
+            ]
+        selected = []
+        for row in heapq.merge(*(self.player_rows[player_id] for player_id in players)):
+            index = table.video[row]
+            if selected and selected[-1][0] == index:
+                selected[-1][1].append(row)
+            elif wanted(index):
+                selected.append((index, [row]))
+        return selected
+
+    def mentions(self, names=(), prefix='', channel='', since='', until='', page=1, per_page=PER_PAGE):
+        players = self.player_ids(names, prefix) if names or prefix else None
+        key = (tuple(players) if players is not None else None, channel, since, until)
+        selected = self.results.get(key, lambda: self.select(players, channel, since, until))
+        start = (page - 1) * per_page
+        return {
+            'total': len(selected),
+            'page': page,
+            'perPage': per_page,
+            'pages': (len(selected) + per_page - 1) // per_page,
+            'videos': [self.table.entry(index, rows) for index, rows in selected[start:start + per_page]],
+        }
+
+    def players(self, prefix='', limit=PER_PAGE):
+        ids = search(self.search, prefix) if prefix else self.search['top']
+        return {
+            'players': [
+                {'name': self.table.players[i], 'mentions': self.mention_counts[i], 'videos': self.video_counts[i]}
+                for i in ids[:limit]
+            ]
+        }
+
+    def channels(self):
+        counts = self.table.channel_video_counts()
+        return {'channels': [{'name': name, 'videos': count} for name, count in zip(self.table.channels, counts)]}
+
+
+class MentionService:
+    """Holds the current snapshot of a source and swaps in a new one when the source changes."""
+
+    def __init__(self, source, cache_size=QUERY_CACHE_SIZE):
+        self.source = Path(source)
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.reloads = 0
+        self.reload()
+
+    def reload(self):
+        """Load the source into a new snapshot and make it current."""
+        version = source_version(self.source)
+        with METRICS.timer('load'):
+            table = load_table(self.source)
+        snapshot = Snapshot(table, version, self.cache_size)
+        with self.lock:
+            self.snapshot = snapshot
+            self.reloads += 1
+        print(f"Loaded {table.video_count:,} videos, {len(table):,} mentions from {self.source}")
+
+    def changed(self):
+        return source_version(self.source) != self.snapshot.version
+
+    def watch(self, interval=RELOAD_CHECK_SECONDS, stop=None):
+        """Reload whenever the source changes, until stop is set."""
+        stop = stop or threading.Event()
+        while not stop.wait(interval):
+            try:
+                if self.changed():
+                    self.reload()
+            except Exception as e:
+                # Keep serving the old snapshot, e.g. while a file is rewritten
+                print(f"Reload failed: {e}")
+
+    def status(self):
+        snapshot = self.snapshot
+        return {
+            'source': str(self.source),
+            'loaded': snapshot.loaded,
+            'reloads': self.reloads,
+            'videos': snapshot.table.video_count,
+            'mentions': len(snapshot.table),
+            'players': len(snapshot.table.players),
+            'queryCache': snapshot.results.stats(),
+        }
+
+
+def day(value):
+    """Validate a YYYY-MM-DD query value."""
+    if value:
+        date.fromisoformat(value)
+    return value
+
+
+def number(value, default, maximum=None):
+    value = int(value) if value else default
+    if value < 1:
+        raise ValueError(f"expected a positive number, got {value}")
+    return min(value, maximum) if maximum else value
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the service's current snapshot."""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        def param(name, default=''):
+            return params.get(name, [default])[0]
+
+        start = time.perf_counter()
+        snapshot = self.service.snapshot
+        try:
+            if url.path == '/mentions':
+                body = snapshot.mentions(
+                    names=params.get('player', []), prefix=param('prefix'), channel=param('channel'),
+                    since=day(param('since')), until=day(param('until')),
+                    page=number(param('page'), 1), per_page=number(param('per_page'), PER_PAGE, MAX_PER_PAGE),
+                )
+            elif url.path == '/players':
+                body = snapshot.players(param('prefix'), number(param('limit'), PER_PAGE, MAX_PER_PAGE))
+            elif url.path == '/channels':
+                body = snapshot.channels()
+            elif url.path == '/status':
+                body = self.service.status()
+            elif url.path == '/metrics':
+                self.respond(200, METRICS.prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+                return
+            else:
+                self.respond_json(404, {'error': f"unknown path {url.path}"})
+                return
+        except ValueError as e:
+            self.respond_json(400, {'error': str(e)})
+            return
+        METRICS.observe('query', time.perf_counter() - start)
+        METRICS.count('queries')
+        self.respond_json(200, body)
+
+    def respond_json(self, status, body):
+        self.respond(status, json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                     'application/json; charset=utf-8')
+
+    def respond(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under a burst of clients
+    request_queue_size = 128
+
+
+def make_server(service, host=HOST, port=PORT):
+    """Return a threaded HTTP server answering queries from service."""
+    handler = type('Handler', (QueryHandler,), {'service': service})
+    return QueryServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve mention queries over local HTTP')
+    parser.add_argument('--source', type=Path, default=CACHE_DB_PATH,
+                        help='video cache database or mentions.json to load')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--cache-size', type=int, default=QUERY_CACHE_SIZE, help='query results kept')
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_CHECK_SECONDS,
+                        help='seconds between checks of the source for changes')
+    args = parser.parse_args(argv)
+
+    if not args.source.exists():
+        print(f"Error: {args.source} not found - run the indexer first")
+        return 1
+    service = MentionService(args.source, args.cache_size)
+    server = make_server(service, args.host, args.port)
+    stop = threading.Event()
+    threading.Thread(target=service.watch, args=(args.reload_interval, stop), daemon=True).start()
+    print(f"Serving on http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
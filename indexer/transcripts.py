@@ -0,0 +1,135 @@
+"""
+Local raw transcript store.
+Keeps every fetched transcript as zlib-compressed segments in SQLite, keyed
+by video ID and language, so roster changes can be re-matched offline.
+"""
+
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from fetcher import Snippet
+
+STORE_PATH = Path(__file__).parent / 'cache' / 'transcripts.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    fetched_date TEXT NOT NULL,
+    segments BLOB NOT NULL,
+    PRIMARY KEY (video_id, language)
+)
+"""
+
+
+def segment_rows(transcript):
+    """Return transcript entries as [start, duration, text] rows."""
+    return [[round(entry.start, 3), round(entry.duration, 3), entry.text] for entry in transcript]
+
+
+def encode_segments(transcript):
+    """Pack transcript entries into a compressed JSON blob."""
+    rows = segment_rows(transcript)
+    return zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def row_segments(rows):
+    """Turn [start, duration, text] rows back into Snippets."""
+    return [Snippet(caption, start, duration) for start, duration, caption in rows]
+
+
+def parse_segments(text):
+    """Turn the JSON text of a stored transcript into Snippets."""
+    return row_segments(json.loads(text))
+
+
+def decode_segments(blob):
+    """Unpack a blob written by encode_segments into Snippets."""
+    return parse_segments(zlib.decompress(blob).decode())
+
+
+class TranscriptStore:
+    """SQLite-backed store of raw transcripts."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __contains__(self, video_id):
+        row = self.conn.execute(
+            'SELECT 1 FROM transcripts WHERE video_id = ? LIMIT 1', (video_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(DISTINCT video_id) FROM transcripts').fetchone()[0]
+
+    def put(self, video_id, transcript, language=None):
+        """Store a fetched transcript, replacing any earlier copy."""
+        language = language or getattr(transcript, 'language_code', None) or 'en'
+        self.conn.execute(
+            'INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)',
+            (video_id, language, datetime.utcnow().isoformat(), encode_segments(transcript))
+        )
+        self.conn.commit()
+
+    def get_text(self, video_id):
+        """Return the newest stored transcript as raw JSON text, or None.
+
+        Cheap to substring-search before paying for parse_segments.
+        """
+        row = self.conn.execute(
+            'SELECT segments FROM transcripts WHERE video_id = ? ORDER BY fetched_date DESC LIMIT 1',
+            (video_id,)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode() if row else None
+
+    def get(self, video_id, language=None):
+        """Return a stored transcript as a list of Snippets, or None."""
+        if language:
+            row = self.conn.execute(
+                'SELECT segments FROM transcripts WHERE video_id = ? AND language = ?',
+                (video_id, language)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                'SELECT segments FROM transcripts WHERE video_id = ? ORDER BY fetched_date DESC LIMIT 1',
+                (video_id,)
+            ).fetchone()
+        return decode_segments(row[0]) if row else None
+
+    def versions(self):
+        """Return {video_id: fetched_date} for the newest copy of every video."""
+        return dict(self.conn.execute(
+            'SELECT video_id, MAX(fetched_date) FROM transcripts GROUP BY video_id'
+        ))
+
+    def blobs(self):
+        """Yield (video_id, compressed blob) for the newest copy of every video.
+
+        Blobs are what worker processes are sent: smaller to pickle than
+        Snippets, and decoded with decode_segments.
+        """
+        rows = self.conn.execute(
+            'SELECT video_id, segments FROM transcripts ORDER BY video_id, fetched_date DESC'
+        )
+        last = None
+        for video_id, blob in rows:
+            if video_id == last:
+                continue
+            last = video_id
+            yield video_id, blob
+
+    def items(self):
+        """Yield (video_id, transcript) for the newest copy of every video."""
+        for video_id, blob in self.blobs():
+            yield video_id, decode_segments(blob)